@@ -0,0 +1,84 @@
+import time
+import asyncio
+from telegram import ChatMember, ChatMemberUpdated
+
+
+ADMIN_STATUSES = (ChatMember.ADMINISTRATOR, ChatMember.OWNER)
+
+
+class AdminCache:
+    """
+    Кэш администраторов чатов.
+    Список администраторов чата загружается одним запросом getChatAdministrators
+    и хранится в памяти до истечения TTL. Повышения и понижения участников
+    применяются к кэшу по обновлениям chat_member, устаревший или
+    загруженный с ошибкой список при этом сбрасывается.
+    """
+
+    def __init__(self, ttl: float = 600, error_ttl: float = 60):
+        self.__ttl = ttl
+        self.__error_ttl = error_ttl
+        # chat_id -> (срок действия, администраторы, загружен ли без ошибки)
+        self.__rosters: dict[int, tuple[float, set[int], bool]] = {}
+        self.__locks: dict[int, asyncio.Lock] = {}
+
+    async def get_admins(self, bot, chat_id: int) -> set[int]:
+        """
+        Возвращает идентификаторы администраторов чата
+        """
+        entry = self.__rosters.get(chat_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        # Одновременные запросы по одному чату ждут одной загрузки
+        lock = self.__locks.setdefault(chat_id, asyncio.Lock())
+        async with lock:
+            entry = self.__rosters.get(chat_id)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+
+            try:
+                administrators = await bot.get_chat_administrators(chat_id)
+                admins = {member.user.id for member in administrators}
+                expires_at = time.monotonic() + self.__ttl
+                loaded = True
+            except Exception as e:
+                print(f"❌ Не удалось получить администраторов чата {chat_id}: {e}")
+                admins = set()
+                expires_at = time.monotonic() + self.__error_ttl
+                loaded = False
+
+            self.__rosters[chat_id] = (expires_at, admins, loaded)
+            return admins
+
+    async def is_admin(self, bot, chat_id: int, user_id: int) -> bool:
+        """
+        Проверяет, является ли пользователь администратором чата
+        """
+        return user_id in await self.get_admins(bot, chat_id)
+
+    def apply_update(self, chat_member: ChatMemberUpdated):
+        """
+        Применяет изменение статуса участника к кэшу чата.
+        Устаревший или неполный (после ошибки загрузки) список не исправляется,
+        а сбрасывается: при следующей проверке он загружается заново
+        """
+        chat_id = chat_member.chat.id
+        entry = self.__rosters.get(chat_id)
+        if not entry:
+            return
+        if not entry[2] or entry[0] <= time.monotonic():
+            self.invalidate(chat_id)
+            return
+
+        user_id = chat_member.new_chat_member.user.id
+        if chat_member.new_chat_member.status in ADMIN_STATUSES:
+            entry[1].add(user_id)
+        else:
+            entry[1].discard(user_id)
+
+    def invalidate(self, chat_id: int):
+        """
+        Сбрасывает кэш администраторов чата
+        """
+        self.__rosters.pop(chat_id, None)
@@ -0,0 +1,38 @@
+import asyncio
+
+
+class AlbumBuffer:
+    """
+    Буфер сообщений альбома (media_group_id).
+    Каждое фото альбома приходит отдельным обновлением, поэтому сообщения
+    накапливаются в течение delay секунд и передаются в on_album одним списком.
+    """
+
+    def __init__(self, on_album, delay: float = 1.0):
+        self.__on_album = on_album
+        self.__delay = delay
+        self.__albums: dict[tuple[int, str], list] = {}
+        self.__tasks: set[asyncio.Task] = set()
+
+    def add(self, message, context):
+        """
+        Добавляет сообщение в альбом, первое сообщение запускает ожидание
+        """
+        key = (message.chat_id, message.media_group_id)
+        album = self.__albums.get(key)
+        if album is not None:
+            album.append(message)
+            return
+
+        self.__albums[key] = [message]
+        task = asyncio.create_task(self.__flush_later(key, context))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    async def __flush_later(self, key, context):
+        await asyncio.sleep(self.__delay)
+        messages = self.__albums.pop(key)
+        try:
+            await self.__on_album(messages, context)
+        except Exception as e:
+            print(f"❌ Ошибка при проверке альбома: {e}")
@@ -0,0 +1,103 @@
+import re
+import asyncio
+from collections import Counter
+from datetime import datetime
+from psycopg2.extras import execute_values
+
+
+# Ссылка из группы: from_group_<chat_id> (раньше — from_group_<название>)
+GROUP_PAYLOAD_PATTERN = re.compile(r"from_group_(.+)")
+
+
+class Attribution:
+    """
+    Учет переходов в бота по параметру /start (deep link).
+    Переходы считаются в памяти по дню, источнику (group, campaign,
+    other, direct) и ключу источника, а раз в flush_interval секунд
+    записываются в start_attribution приращениями одним запросом.
+    """
+
+    def __init__(self, db, timezone, flush_interval: float = 60):
+        self.__db = db
+        self.__timezone = timezone
+        self.__flush_interval = flush_interval
+        self.__counters: Counter = Counter()
+        self.__task: asyncio.Task | None = None
+
+    @staticmethod
+    def parse(payload: str | None) -> tuple[str, str]:
+        """
+        Возвращает источник перехода и его ключ
+        """
+        if not payload:
+            return "direct", ""
+        match = GROUP_PAYLOAD_PATTERN.fullmatch(payload)
+        if match:
+            return "group", match.group(1)[:64]
+        if payload.startswith("reminder_") or payload in ("weekly_new", "sales"):
+            return "campaign", payload
+        return "other", payload[:64]
+
+    def count(self, payload: str | None):
+        """
+        Учитывает переход
+        """
+        day = datetime.now(self.__timezone).date()
+        source, key = self.parse(payload)
+        self.__counters[(day, source, key)] += 1
+
+    async def start(self):
+        self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self):
+        if self.__task:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Записывает накопленные счетчики
+        """
+        if not self.__counters:
+            return
+
+        counters, self.__counters = self.__counters, Counter()
+        rows = [(day, source, key, n) for (day, source, key), n in counters.items()]
+
+        def operation(cursor):
+            execute_values(
+                cursor,
+                "INSERT INTO start_attribution (day, source, key, count) VALUES %s "
+                "ON CONFLICT (day, source, key) "
+                "DO UPDATE SET count = start_attribution.count + EXCLUDED.count",
+                rows,
+            )
+
+        try:
+            await self.__db.run(operation)
+        except Exception as e:
+            self.__counters.update(counters)
+            print(f"❌ Ошибка при записи статистики переходов: {e}")
+
+    async def report(self, days: int) -> list[tuple[str, str, int]]:
+        """
+        Переходы за последние days дней: (источник, ключ, количество)
+        """
+        await self.flush()
+        today = datetime.now(self.__timezone).date()
+        return await self.__db.fetchall(
+            "SELECT source, key, SUM(count) FROM start_attribution "
+            "WHERE day > %s::date - %s GROUP BY source, key "
+            "ORDER BY source, SUM(count) DESC",
+            (today, days),
+        )
+
+    async def __run(self):
+        while True:
+            await asyncio.sleep(self.__flush_interval)
+            await self.flush()
@@ -0,0 +1,109 @@
+import io
+import csv
+from datetime import datetime, timezone
+from batch_writer import BatchWriter
+
+
+# Максимальная длина сохраняемого текста сообщения
+MAX_CONTENT_LENGTH = 1000
+
+AUDIT_COLUMNS = (
+    "created_at",
+    "event",
+    "chat_id",
+    "user_id",
+    "message_ids",
+    "reason",
+    "detail",
+    "content",
+)
+
+
+class AuditLog:
+    """
+    Журнал событий модерации и доставки рассылок (таблица moderation_events).
+    События добавляются в буфер без обращения к базе данных,
+    а BatchWriter записывает их пакетами через COPY.
+    """
+
+    def __init__(self, db, batch_size: int = 500, flush_interval: float = 2.0):
+        self.__db = db
+        self.__writer = BatchWriter(
+            "Журнал модерации",
+            self.__copy,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+        )
+
+    async def start(self):
+        await self.__writer.start()
+
+    async def stop(self):
+        await self.__writer.stop()
+
+    def add(
+        self,
+        event: str,
+        chat_id: int,
+        user_id: int | None = None,
+        message_ids: list[int] | None = None,
+        reason: str | None = None,
+        detail: str | None = None,
+        content: str | None = None,
+    ):
+        """
+        Добавляет событие в журнал
+        """
+        self.__writer.add(
+            (
+                datetime.now(timezone.utc).isoformat(),
+                event,
+                chat_id,
+                user_id,
+                "{%s}" % ",".join(map(str, message_ids)) if message_ids else None,
+                reason,
+                detail,
+                content[:MAX_CONTENT_LENGTH] if content else None,
+            )
+        )
+
+    def message_deleted(self, messages: list, reason: str, detail=None):
+        """
+        Удаление сообщения (или альбома) пользователя
+        """
+        first = messages[0]
+        content = next(
+            (m.text or m.caption for m in messages if m.text or m.caption), None
+        )
+        self.add(
+            "deleted",
+            first.chat_id,
+            first.from_user.id,
+            [m.message_id for m in messages],
+            reason,
+            str(detail) if detail is not None else None,
+            content,
+        )
+
+    def delivery_failed(self, campaign: str, chat_id: int, error: Exception):
+        """
+        Ошибка доставки рассылки в группу
+        """
+        self.add("delivery_failed", chat_id, reason=campaign, detail=str(error))
+
+    async def __copy(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            # Пустые строки сохраняются как NULL
+            writer.writerow([None if value == "" else value for value in row])
+        buffer.seek(0)
+
+        def operation(cursor):
+            cursor.copy_expert(
+                "COPY moderation_events (%s) FROM STDIN WITH (FORMAT csv)"
+                % ", ".join(AUDIT_COLUMNS),
+                buffer,
+            )
+
+        await self.__db.run(operation)
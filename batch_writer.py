@@ -0,0 +1,86 @@
+import asyncio
+
+
+class BatchWriter:
+    """
+    Отложенная пакетная запись в базу данных.
+    Обработчики добавляют строки в буфер в памяти и сразу возвращаются,
+    а фоновая задача передает накопленные строки в write(rows), когда
+    их набирается batch_size или проходит flush_interval секунд.
+    При ошибке записи строки остаются в буфере (не больше max_pending).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        write,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        max_pending: int = 100000,
+    ):
+        self.__name = name
+        self.__write = write
+        self.__batch_size = batch_size
+        self.__flush_interval = flush_interval
+        self.__max_pending = max_pending
+        self.__pending: list = []
+        self.__wakeup = asyncio.Event()
+        self.__task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self.__pending)
+
+    def add(self, row):
+        """
+        Добавляет строку в буфер записи
+        """
+        self.__pending.append(row)
+        if len(self.__pending) >= self.__batch_size:
+            self.__wakeup.set()
+
+    async def start(self):
+        """
+        Запускает фоновую запись
+        """
+        self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self):
+        """
+        Останавливает фоновую запись и сохраняет оставшиеся строки
+        """
+        if self.__task:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Записывает накопленные строки пакетами по batch_size
+        """
+        while self.__pending:
+            rows = self.__pending[: self.__batch_size]
+            del self.__pending[: self.__batch_size]
+            try:
+                await self.__write(rows)
+            except Exception as e:
+                self.__pending = rows + self.__pending
+                dropped = len(self.__pending) - self.__max_pending
+                if dropped > 0:
+                    # Самые старые строки теряются, чтобы не переполнить память
+                    del self.__pending[:dropped]
+                    print(f"⚠️ {self.__name}: отброшено строк: {dropped}")
+                print(f"❌ {self.__name}: ошибка при записи: {e}")
+                return
+
+    async def __run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.__wakeup.wait(), self.__flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.__wakeup.clear()
+            await self.flush()
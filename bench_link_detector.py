@@ -0,0 +1,126 @@
+"""
+Нагрузочная проверка детектора ссылок на враждебных входных данных.
+Для каждого шаблона строится текст длиной до 4096 символов (лимит Telegram)
+и измеряется время проверки. Время p99 не должно расти с длиной текста
+быстрее, чем линейно.
+
+Второй раздел сравнивает проверку без нормализации и с ней: долю
+найденных обфусцированных ссылок, ложные срабатывания на обычных
+сообщениях и время проверки одного сообщения.
+
+Запуск: python bench_link_detector.py [повторов]
+"""
+
+import sys
+import time
+from link_detector import LinkDetector
+
+
+# Длина текста сообщения в Telegram не превышает 4096 символов
+LENGTHS = (256, 512, 1024, 2048, 4096)
+
+# Шаблоны, вызывающие возврат (backtracking) в наивных регулярных выражениях
+ADVERSARIAL_CORPUS = {
+    "markdown_open": lambda n: "[" * n,
+    "markdown_unclosed": lambda n: ("[a](" * n)[:n],
+    "html_unclosed": lambda n: ('<a href="' * n)[:n],
+    "html_tags": lambda n: ("<" * (n - 1)) + ">",
+    "domain_labels": lambda n: ("a." * n)[: n - 1] + "!",
+    "long_label": lambda n: "a" * (n - 4) + ".a.",
+    "cyrillic_run": lambda n: "а" * (n - 4) + ".ru",
+    "dotted_words": lambda n: ("ab-" * n)[: n - 2] + ".",
+    "email_like": lambda n: "a@" + ("a." * n)[: n - 3] + "!",
+    "plain_text": lambda n: ("Привет, как дела? Всё хорошо. " * n)[:n],
+}
+
+
+# Обфусцированные ссылки из спама
+OBFUSCATED_CORPUS = [
+    "Заходи t . me/spam_channel",
+    "Подробности на site(dot)ru",
+    "Пиши сюда: shop [.] com",
+    "Скидки на mebel точка ru",
+    "Канал: ｔ．ｍｅ／ｓｐａｍ",
+    "Переходи t\u200b.\u200bme/spam",
+    "Лучшие цены spаm-shop.сom",
+    "Смотри ехаmрlе-shор.nеt",
+    "Регистрация на casino\u2024com",
+    "bit . ly/abc123 забирай бонус",
+    "Наш магазин super-mebel . ru",
+    "www\u200c.spam\u200c.com",
+]
+
+# Обычные сообщения в группах, срабатываний быть не должно
+BENIGN_CORPUS = [
+    "Привет! Сколько стоит этот диван?",
+    "Спасибо, заказ получили. Всё отлично",
+    "Купил iPhone.Классный",
+    "Samsung.Ура, пришел",
+    "Доставка будет в 12.30, ждите",
+    "И т.д. и т.п. Короче, всё понятно",
+    "Цена 15 000 руб. Размер 2.5 x 1.8 м",
+    "Привет . Как дела? Есть ли скидки",
+    "Пишите в личку, отвечу всем",
+    "Вечером буду дома, привезите после 18:00",
+    "see you tomorrow . to be continued",
+    "Thanks . Pro tip: buy a sofa",
+    "Really . Me too",
+    "Hello world . Shop now",
+]
+
+
+def compare(detector: LinkDetector, repeats: int):
+    print(f"\n{'корпус':<16}{'без нормализации':>20}{'с нормализацией':>20}")
+    for name, corpus in (
+        ("обфусцированные", OBFUSCATED_CORPUS),
+        ("обычные", BENIGN_CORPUS),
+    ):
+        before = sum(bool(detector.scan(text)) for text in corpus)
+        after = sum(bool(detector.contains_links(text)) for text in corpus)
+        print(
+            f"{name:<16}{before:>14} из {len(corpus):<3}{after:>14} из {len(corpus):<3}"
+        )
+
+    corpus = OBFUSCATED_CORPUS + BENIGN_CORPUS
+    for title, check in (
+        ("без нормализации", detector.scan),
+        ("с нормализацией", detector.contains_links),
+    ):
+        started_at = time.perf_counter()
+        for _ in range(repeats):
+            for text in corpus:
+                check(text)
+        duration = time.perf_counter() - started_at
+        print(
+            f"Время проверки {title}: "
+            f"{duration / (repeats * len(corpus)) * 1_000_000:.1f} мкс/сообщение"
+        )
+
+
+def percentile(values: list[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def run(detector: LinkDetector, repeats: int):
+    print(f"{'шаблон':<20}" + "".join(f"{n:>12}" for n in LENGTHS))
+    for name, build in ADVERSARIAL_CORPUS.items():
+        row = []
+        for length in LENGTHS:
+            text = build(length)
+            timings = []
+            for _ in range(repeats):
+                started_at = time.perf_counter()
+                detector.contains_links(text)
+                timings.append(time.perf_counter() - started_at)
+            row.append(percentile(timings, 0.99) * 1000)
+        print(f"{name:<20}" + "".join(f"{ms:>10.3f}ms" for ms in row))
+    print(f"Превышений времени проверки: {detector.budget_exceeded}")
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"p99 времени проверки, повторов: {repeats}")
+    detector = LinkDetector()
+    run(detector, repeats)
+    compare(detector, repeats * 50)
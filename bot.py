@@ -1,8 +1,10 @@
 import os
-import re
+import time
+import signal
 import asyncio
 import threading
 from datetime import datetime
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 from telegram.ext import (
     Application,
@@ -11,32 +13,282 @@ from telegram.ext import (
     MessageHandler,
     filters,
     CallbackQueryHandler,
+    ChatMemberHandler,
 )
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from db import POSTGRES
+from telegram import (
+    Update,
+    ChatMember,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    MessageEntity,
+)
+from db import POSTGRES_POOL
+from link_detector import LinkDetector
+from verdict_cache import VerdictCache
+from scan_executor import ScanExecutor
+from document_inspector import DocumentInspector
+from spam_images import SpamImages
+from domain_rules import DomainRules, GLOBAL_CHAT_ID, ALLOW, DENY, extract_host
+from admin_cache import AdminCache
+from deletion_queue import DeletionQueue
+from broadcast import Broadcaster
+from delivery_ledger import DeliveryLedger
+from job_store import PostgresJobStore
+from webhook_server import WebhookServer
+from update_processor import ChatOrderedUpdateProcessor
+from flood_detector import FloodDetector, message_fingerprint
+from album_buffer import AlbumBuffer
+from group_registry import GroupRegistry
+from audit_log import AuditLog
+from call_requests import CallRequests
+from attribution import Attribution
+from outbound_scheduler import OutboundScheduler, PRIORITY_BROADCAST
 from typing import Optional
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 load_dotenv()
 
+# Сущности Telegram, которые считаются ссылками
+LINK_ENTITY_TYPES = (
+    MessageEntity.URL,
+    MessageEntity.TEXT_LINK,
+    MessageEntity.MENTION,
+    MessageEntity.TEXT_MENTION,
+)
+
+# Через сколько секунд удаляется уведомление о модерации
+NOTICE_LIFETIME = 10
+
+# Причины удаления сообщений для текста уведомления
+NOTICE_REASONS = {
+    "link": (
+        "содержит ссылку",
+        "Ссылки могут отправлять только администратор группы",
+    ),
+    "flood": (
+        "вы отправляете слишком много сообщений",
+        "Пожалуйста, не засоряйте чат",
+    ),
+    "duplicate": (
+        "повторяет уже отправленное сообщение",
+        "Пожалуйста, не отправляйте одно и то же сообщение несколько раз",
+    ),
+    "document": (
+        "содержит файл со ссылкой",
+        "Ссылки могут отправлять только администратор группы",
+    ),
+    "spam_image": (
+        "содержит изображение, отмеченное как реклама",
+        "Пожалуйста, не отправляйте рекламу в группу",
+    ),
+    "mime": (
+        "содержит файл потенциально опасного типа ({detail})",
+        "Такие файлы могут отправлять только администратор группы",
+    ),
+}
+
+# MIME типы потенциально опасных файлов
+SUSPICIOUS_MIME_TYPES = {
+    "application/vnd.android.package-archive",  # APK
+    "application/x-msdownload",  # EXE
+    "application/x-executable",
+    "application/x-sh",
+    "application/x-shellscript",
+    "text/html",  # HTML файлы могут содержать скрытые ссылки
+    "application/xhtml+xml",
+    "application/vnd.ms-powerpoint",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+}
+
+# Часовой пояс расписания рассылок
+TIMEZONE = "Asia/Krasnoyarsk"
+
+# Кампании рассылок
+CAMPAIGN_NAMES = {
+    "morning": "Утреннее напоминание",
+    "dinner": "Обеденное напоминание",
+    "evening": "Вечернее напоминание",
+    "weekly": "Еженедельное обновление",
+}
+
 
 class BOT:
     __token: str | None = None
     __app: Application | None = None
-    __db_connect = None
-    __db = None
+    __update_processor: ChatOrderedUpdateProcessor | None = None
+    __outbound_scheduler: OutboundScheduler | None = None
+    __db: POSTGRES_POOL | None = None
+    __groups: GroupRegistry | None = None
     __scheduler: AsyncIOScheduler | None = None
+    __scheduled_jobs: dict | None = None
+    __link_detector: LinkDetector | None = None
+    __verdict_cache: VerdictCache | None = None
+    __scan_executor: ScanExecutor | None = None
+    __document_inspector: DocumentInspector | None = None
+    __spam_images: SpamImages | None = None
+    __domain_rules: DomainRules | None = None
+    __admin_cache: AdminCache | None = None
+    __flood_detector: FloodDetector | None = None
+    __deletion_queue: DeletionQueue | None = None
+    __album_buffer: AlbumBuffer | None = None
+    __active_notices: dict | None = None
+    __audit: AuditLog | None = None
+    __call_requests: CallRequests | None = None
+    __callback_routes: dict | None = None
+    __attribution: Attribution | None = None
+    __admin_ids: set[int] | None = None
+    __broadcaster: Broadcaster | None = None
+    __ledger: DeliveryLedger | None = None
+    __running_campaigns: set[str] | None = None
+    __resume_task: asyncio.Task | None = None
+
+    instance: "BOT | None" = None
 
     def __init__(self):
+        BOT.instance = self
         self.__token = os.getenv("TELEGRAM_BOT_TOKEN")
-        self.__app = Application.builder().token(self.__token).build()
-        self.__db = POSTGRES()
-        self.__db_connect = self.__db.get_connection()
+        self.__update_processor = ChatOrderedUpdateProcessor(
+            int(os.getenv("UPDATE_CONCURRENCY", 32))
+        )
+        self.__outbound_scheduler = OutboundScheduler(
+            rate=float(os.getenv("OUTBOUND_RATE", 30))
+        )
+        self.__app = (
+            Application.builder()
+            .token(self.__token)
+            .concurrent_updates(self.__update_processor)
+            .rate_limiter(self.__outbound_scheduler)
+            .post_init(self.post_init)
+            .post_stop(self.post_stop)
+            .post_shutdown(self.post_shutdown)
+            .build()
+        )
+        self.__db = POSTGRES_POOL(
+            minconn=int(os.getenv("POSTGRES_POOL_MIN", 1)),
+            maxconn=int(os.getenv("POSTGRES_POOL_MAX", 10)),
+        )
+        self.__groups = GroupRegistry(self.__db)
+        self.__link_detector = LinkDetector(
+            time_budget=float(os.getenv("LINK_SCAN_BUDGET", 0.05))
+        )
+        # Длинные тексты проверяются в пуле, чтобы не задерживать event loop
+        self.__scan_executor = ScanExecutor(
+            self.__link_detector,
+            threshold=int(os.getenv("SCAN_OFFLOAD_THRESHOLD", 1024)),
+            mode=os.getenv("SCAN_MODE", "process"),
+            workers=int(os.getenv("SCAN_WORKERS", 2)),
+            max_pending=int(os.getenv("SCAN_MAX_PENDING", 64)),
+            timeout=float(os.getenv("SCAN_TIMEOUT", 0.5)),
+        )
+        # Проверка содержимого текстовых документов (включается отдельно)
+        if os.getenv("DOCUMENT_INSPECTION", "0") == "1":
+            self.__document_inspector = DocumentInspector(
+                self.scan_text,
+                max_bytes=int(os.getenv("DOCUMENT_MAX_BYTES", 1024 * 1024)),
+                timeout=float(os.getenv("DOCUMENT_TIMEOUT", 5)),
+            )
+        # Домен сайта магазина разрешен всегда
+        self.__domain_rules = DomainRules(
+            self.__db, builtin_allow=[extract_host(os.getenv("URL_WEB"))]
+        )
+        self.__spam_images = SpamImages(
+            self.__db, max_distance=int(os.getenv("SPAM_IMAGE_DISTANCE", 6))
+        )
+        self.__verdict_cache = VerdictCache(
+            max_entries=int(os.getenv("LINK_CACHE_MAX_ENTRIES", 50000)),
+            ttl=float(os.getenv("LINK_CACHE_TTL", 3600)),
+        )
+        self.__admin_cache = AdminCache(ttl=float(os.getenv("ADMIN_CACHE_TTL", 600)))
+        self.__flood_detector = FloodDetector(
+            window=float(os.getenv("FLOOD_WINDOW", 60)),
+            max_messages=int(os.getenv("FLOOD_MAX_MESSAGES", 10)),
+            max_duplicates=int(os.getenv("FLOOD_MAX_DUPLICATES", 3)),
+        )
+        self.__deletion_queue = DeletionQueue(self.__db)
+        self.__album_buffer = AlbumBuffer(
+            self.moderate_messages, delay=float(os.getenv("ALBUM_WAIT", 1.0))
+        )
+        self.__active_notices = {}
+        self.__audit = AuditLog(
+            self.__db,
+            batch_size=int(os.getenv("AUDIT_BATCH_SIZE", 500)),
+            flush_interval=float(os.getenv("AUDIT_FLUSH_INTERVAL", 2.0)),
+        )
+        self.__broadcaster = Broadcaster(
+            concurrency=int(os.getenv("BROADCAST_CONCURRENCY", 20)),
+            chat_interval=float(os.getenv("BROADCAST_CHAT_INTERVAL", 3)),
+        )
+        self.__ledger = DeliveryLedger(self.__db)
+        self.__call_requests = CallRequests(
+            self.__db,
+            dedupe_window=float(os.getenv("CALL_REQUEST_DEDUPE_WINDOW", 3600)),
+        )
+        self.__attribution = Attribution(
+            self.__db,
+            ZoneInfo(TIMEZONE),
+            flush_interval=float(os.getenv("ATTRIBUTION_FLUSH_INTERVAL", 60)),
+        )
+        # Администраторы бота (не групп): доступ к статистике
+        self.__admin_ids = {
+            int(admin_id)
+            for admin_id in os.getenv("ADMIN_IDS", "").split(",")
+            if admin_id.strip()
+        }
+        # Обработчики кнопок по callback_data
+        self.__callback_routes = {
+            "request_call": self.request_call,
+        }
+        self.__running_campaigns = set()
+
+    async def post_init(self, application: Application):
+        """
+        Запуск фоновых задач после инициализации приложения
+        """
+        await self.__groups.start()
+        await self.__domain_rules.start()
+        await self.__audit.start()
+        await self.__call_requests.start()
+        await self.__attribution.start()
+        await self.__scan_executor.start()
+        try:
+            await self.__spam_images.load()
+        except Exception as e:
+            print(f"❌ Ошибка при загрузке спам-изображений: {e}")
+        if self.__document_inspector:
+            await self.__document_inspector.start()
+        await self.__deletion_queue.start(application.bot)
+        self.__resume_task = asyncio.create_task(self.resume_broadcasts())
+        await self.start_scheduler()
+
+    async def post_stop(self, application: Application):
+        """
+        Остановка фоновых задач при остановке приложения
+        """
+        await self.stop_scheduler()
+        await self.__deletion_queue.stop()
+        await self.__groups.stop()
+        await self.__domain_rules.stop()
+        await self.__audit.stop()
+        await self.__call_requests.stop()
+        await self.__attribution.stop()
+        await self.__scan_executor.stop()
+        if self.__document_inspector:
+            await self.__document_inspector.stop()
+
+    async def post_shutdown(self, application: Application):
+        """
+        Закрытие соединений с базой данных после завершения работы
+        """
+        self.__db.close()
 
     async def command_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat = update.effective_chat
 
+        # Учитываем, откуда пришел пользователь (параметр deep link)
+        if chat.type == "private":
+            self.__attribution.count(context.args[0] if context.args else None)
+
         if context.args:
             param = context.args
             await update.message.reply_text(
@@ -51,7 +303,7 @@ class BOT:
                     [
                         InlineKeyboardButton(
                             "✅ Посмотреть",
-                            url=f"https://t.me/{os.getenv('USERNAME_BOT')}?start=from_group_{chat.title}",
+                            url=f"https://t.me/{os.getenv('USERNAME_BOT')}?start=from_group_{chat.id}",
                         ),
                     ],
                 ]
@@ -72,13 +324,282 @@ class BOT:
                     "👇 Нажмите синюю кнопку «Открыть» внизу",
                 )
 
+    async def command_attribution(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ):
+        """
+        Статистика переходов в бота по источникам: /attribution [дней]
+        """
+        if update.effective_user.id not in self.__admin_ids:
+            return
+
+        try:
+            days = int(context.args[0]) if context.args else 7
+            rows = await self.__attribution.report(days)
+        except ValueError:
+            await update.message.reply_text("Использование: /attribution [дней]")
+            return
+        except Exception as e:
+            print(f"❌ Ошибка при получении статистики переходов: {e}")
+            await update.message.reply_text("❌ Не удалось получить статистику")
+            return
+
+        sections = {
+            "campaign": "📢 Рассылки",
+            "group": "👥 Группы",
+            "direct": "🔗 Без параметра",
+            "other": "❔ Другое",
+        }
+        lines = [f"📊 Переходы в бота за {days} дн."]
+        for source, title in sections.items():
+            source_rows = [(key, count) for s, key, count in rows if s == source]
+            if not source_rows:
+                continue
+            lines.append(f"\n{title}:")
+            for key, count in source_rows:
+                if source == "group" and key.lstrip("-").isdigit():
+                    key = self.__groups.title(int(key)) or key
+                lines.append(f"   - {key or '—'}: {count}")
+        if not rows:
+            lines.append("\nПереходов пока нет")
+
+        await update.message.reply_text("\n".join(lines))
+
+    async def command_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Счетчики проверки сообщений с момента запуска: /stats
+        """
+        if update.effective_user.id not in self.__admin_ids:
+            return
+
+        scan = self.scan_stats()
+        lines = [
+            "📈 Статистика с момента запуска",
+            "\n🔗 Проверка ссылок:",
+            f"   - сразу: {scan['inline']}, в пуле: {scan['offloaded']} "
+            f"({scan['offload_rate']:.0%})",
+            f"   - в очереди пула: {scan['pending']}, "
+            f"ожидание: {scan['queue_wait_avg'] * 1000:.1f} мс "
+            f"(макс. {scan['queue_wait_max'] * 1000:.1f} мс)",
+            f"   - переполнений очереди: {scan['overflows']}",
+            f"   - не завершились вовремя: {scan['timeouts']}",
+            f"   - перезапусков пула: {scan['restarts']}",
+            f"   - результат не определен: {scan['undecided']}",
+        ]
+        cache = self.verdict_cache_stats()
+        lines += [
+            "\n🗂 Кэш вердиктов:",
+            f"   - попаданий: {cache['hits']}, промахов: {cache['misses']} "
+            f"({cache['hit_rate']:.0%})",
+            f"   - записей: {cache['size']}",
+        ]
+        depths = self.__update_processor.queue_depths()
+        lines += [
+            "\n📥 Обработка обновлений:",
+            f"   - принято: {self.__update_processor.current_concurrent_updates} "
+            f"(одновременно до {self.__update_processor.concurrency})",
+            f"   - чатов с обновлениями в очереди: {len(depths)}",
+        ]
+        busiest = sorted(depths.items(), key=lambda item: item[1], reverse=True)
+        for chat_id, depth in busiest[:5]:
+            lines.append(f"   - {self.__groups.title(chat_id) or chat_id}: {depth}")
+        lines += [
+            "\n📤 Запросы к Telegram:",
+            f"   - ждут отправки: {self.__outbound_scheduler.queue_size()}",
+        ]
+        if self.__document_inspector:
+            documents = self.__document_inspector.stats()
+            lines += [
+                "\n📄 Документы:",
+                f"   - скачано: {documents['downloads']} "
+                f"({documents['downloaded_bytes'] / 1024:.0f} КБ)",
+                f"   - из кэша: {documents['cache']['hits']}",
+                f"   - ошибок: {documents['errors']}",
+                f"   - результат не определен: {documents['undecided']}",
+            ]
+
+        await update.message.reply_text("\n".join(lines))
+
+    async def command_spam_image(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ):
+        """
+        Отмечает изображение как рекламу: /spam_image в ответ на сообщение с фото.
+        Доступно администраторам группы и бота
+        """
+        message = update.message
+        chat = update.effective_chat
+        user_id = update.effective_user.id
+        is_group = chat.type in ["group", "supergroup"]
+        if user_id not in self.__admin_ids and not (
+            is_group and await self.check_user_admin(chat.id, user_id, context.bot)
+        ):
+            return
+
+        target = message.reply_to_message
+        if not target or not target.photo:
+            await message.reply_text(
+                "Ответьте командой /spam_image на сообщение с изображением"
+            )
+            return
+
+        try:
+            await self.__spam_images.add(context.bot, target.photo, user_id, chat.id)
+        except Exception as e:
+            print(f"❌ Ошибка при добавлении спам-изображения: {e}")
+            await message.reply_text("❌ Не удалось сохранить изображение")
+            return
+
+        self.__audit.add(
+            "spam_image_added",
+            chat.id,
+            user_id,
+            [target.message_id],
+            detail=target.photo[0].file_unique_id,
+        )
+        text = (
+            "🖼 Изображение добавлено в список рекламы "
+            f"(всего: {len(self.__spam_images)})"
+        )
+        if not is_group:
+            await message.reply_text(text)
+            return
+
+        try:
+            await context.bot.delete_messages(
+                chat.id, [target.message_id, message.message_id]
+            )
+            notice = await context.bot.send_message(chat.id, text)
+            self.__deletion_queue.schedule(
+                chat.id, notice.message_id, NOTICE_LIFETIME
+            )
+        except Exception as e:
+            print(f"❌ Ошибка при удалении спам-изображения: {e}")
+
+    async def domain_rules_scope(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> int | None:
+        """
+        Чьи правила доменов может менять пользователь: в группе — правила
+        группы (администраторы группы и бота), в личном чате — общие
+        правила (администраторы бота)
+        """
+        chat = update.effective_chat
+        user_id = update.effective_user.id
+        if chat.type in ["group", "supergroup"]:
+            if user_id in self.__admin_ids or await self.check_user_admin(
+                chat.id, user_id, context.bot
+            ):
+                return chat.id
+            return None
+        return GLOBAL_CHAT_ID if user_id in self.__admin_ids else None
+
+    async def command_domain_rule(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ):
+        """
+        Изменение правил доменов: /allow_domain, /deny_domain, /remove_domain <домен>
+        """
+        scope = await self.domain_rules_scope(update, context)
+        if scope is None:
+            return
+
+        message = update.message
+        command = message.text.split()[0][1:].split("@")[0].lower()
+        domain = extract_host(context.args[0]) if context.args else None
+        if not domain or "." not in domain:
+            await message.reply_text(f"Использование: /{command} <домен>")
+            return
+
+        user_id = update.effective_user.id
+        try:
+            if command == "remove_domain":
+                if await self.__domain_rules.remove(scope, domain):
+                    text = f"🗑 Правило для {domain} удалено"
+                else:
+                    text = f"Правила для {domain} нет"
+                action = None
+            else:
+                action = ALLOW if command == "allow_domain" else DENY
+                await self.__domain_rules.set(scope, domain, action, user_id)
+                text = (
+                    f"✅ Ссылки на {domain} разрешены"
+                    if action == ALLOW
+                    else f"⛔️ Ссылки на {domain} запрещены"
+                )
+        except Exception as e:
+            print(f"❌ Ошибка при изменении правил доменов: {e}")
+            await message.reply_text("❌ Не удалось изменить правила")
+            return
+
+        self.__audit.add(
+            "domain_rule", scope, user_id, reason=action or "remove", detail=domain
+        )
+        await message.reply_text(text)
+
+    async def command_domains(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Список правил доменов группы (или общих в личном чате): /domains
+        """
+        scope = await self.domain_rules_scope(update, context)
+        if scope is None:
+            return
+
+        rules = self.__domain_rules.rules(scope)
+        title = "всех групп" if scope == GLOBAL_CHAT_ID else "группы"
+        lines = [f"🌐 Правила доменов для {title}"]
+        for action, section in ((ALLOW, "✅ Разрешены"), (DENY, "⛔️ Запрещены")):
+            domains = sorted(d for d, a in rules.items() if a == action)
+            if not domains:
+                continue
+            lines.append(f"\n{section}:")
+            lines.extend(f"   - {domain}" for domain in domains)
+        if not rules:
+            lines.append("\nПравил пока нет")
+
+        await update.message.reply_text("\n".join(lines))
+
     async def callback_handler(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ):
+        """
+        Передает нажатие кнопки обработчику по callback_data
+        """
         query = update.callback_query
-        await query.answer()
+        handler = self.__callback_routes.get(query.data)
+        if handler is None:
+            await query.answer()
+            print(f"⚠️ Неизвестная кнопка: {query.data}")
+            return
+
+        try:
+            await handler(update, context)
+        except Exception as e:
+            print(f"❌ Ошибка при обработке кнопки {query.data}: {e}")
+
+    async def request_call(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Заявка на обратный звонок из рассылки
+        """
+        query = update.callback_query
+        message = query.message
+        is_new = self.__call_requests.record(
+            query.from_user,
+            message.chat.id if message else None,
+            message.message_id if message else None,
+        )
 
-        print("command bot")
+        if is_new:
+            print(f"📞 Заявка на звонок от {query.from_user.full_name}")
+            await query.answer(
+                "✅ Спасибо! Заявка принята, менеджер свяжется с вами в ближайшее время.",
+                show_alert=True,
+            )
+        else:
+            await query.answer(
+                "👌 Ваша заявка уже принята, менеджер скоро свяжется с вами.",
+                show_alert=True,
+            )
 
     async def new_chat_members(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -103,22 +624,13 @@ class BOT:
             for member in update.message.new_chat_members:
                 if member.id == context.bot.id:
                     bot_was_added = True
-                    table_exists = self.__db.table_exists("telegram_groups")
-
-                    if table_exists == True:
-                        cursor = self.__db_connect.cursor()
-                        data = (chat.id, chat.title)
-                        cursor.execute(
-                            "INSERT INTO telegram_groups (chat_id, title) VALUES (%s, %s)",
-                            data,
-                        )
-                        self.__db_connect.commit()
+                    await self.__groups.upsert(chat.id, chat.title)
 
                     keyboard = [
                         [
                             InlineKeyboardButton(
                                 "✅ Открыть бота",
-                                url=f"https://t.me/{os.getenv('USERNAME_BOT')}?start=from_group_{chat.title}",
+                                url=f"https://t.me/{os.getenv('USERNAME_BOT')}?start=from_group_{chat.id}",
                             ),
                             InlineKeyboardButton("🔗 Сайт", url=os.getenv("URL_WEB")),
                         ],
@@ -145,192 +657,131 @@ class BOT:
             print(f"🤖 Бот добавлен в группу: {chat.title} (ID: {chat.id})")
 
         except Exception as e:
-            self.__db_connect.rollback()
             print(f"❌ Ошибка в обработчике новых участников: {e}")
 
-    def contains_links(self, text: Optional[str]) -> bool:
+    async def contains_links(
+        self, text: Optional[str], chat_id: Optional[int] = None
+    ) -> bool:
         """
-        Проверяет наличие ссылок в тексте.
-        Определяет все виды ссылок: с протоколом, без протокола, Telegram-ссылки,
-        IP-адреса, Markdown и HTML ссылки.
+        Проверяет наличие ссылок в тексте (см. LinkDetector).
+        Повторяющиеся тексты (после нормализации) берутся из кэша вердиктов,
+        длинные тексты проверяются в пуле (см. ScanExecutor).
+        Ссылки только на разрешенные в группе домены нарушением не считаются.
+        Если проверка не уложилась в бюджет времени, сообщение пропускается
+        (как документы, которые не удалось проверить), но результат
+        не кэшируется
         """
-        # Проверка на None или пустую строку
-        if not text or not isinstance(text, str):
+        if not text:
             return False
 
-        # Проверка на Markdown ссылки [текст](URL)
-        if re.search(r"\[.*?\]\(.*?\)", text):
-            return True
+        # Варианты одной обфусцированной ссылки дают один ключ кэша
+        normalized = self.__link_detector.normalize(text)
+        key = VerdictCache.fingerprint(normalized)
+        verdict = self.__verdict_cache.get(key)
+        if verdict is None:
+            verdict = await self.__scan_executor.scan(normalized)
+            if verdict is None:
+                return False
+            self.__verdict_cache.put(key, verdict)
+
+        # Кэшируется вердикт детектора, правила группы применяются после него.
+        # Ссылки ищутся один раз для текста и хранятся вместе с вердиктом
+        if verdict and chat_id is not None and self.__domain_rules.has_allowed(chat_id):
+            links = self.__verdict_cache.links(key)
+            if links is None:
+                links = await self.__scan_executor.find_links(normalized)
+                if links is not None:
+                    self.__verdict_cache.set_links(key, links)
+            verdict = not self.__domain_rules.allows_all(chat_id, links)
+        return verdict
+
+    async def scan_text(self, text: str) -> bool | None:
+        """
+        Проверяет текст без кэша вердиктов (части документов),
+        None, если результат не определен
+        """
+        normalized = self.__link_detector.normalize(text)
+        return await self.__scan_executor.scan(normalized)
 
-        # Проверка на HTML ссылки <a href="...">текст</a>
-        if re.search(r'<a\s+[^>]*href="[^"]*"[^>]*>.*?</a>', text, re.IGNORECASE):
-            return True
+    def verdict_cache_stats(self) -> dict:
+        """
+        Счетчики попаданий и промахов кэша вердиктов
+        """
+        return self.__verdict_cache.stats()
 
-        # Проверка на Telegram-специфичные ссылки
-        telegram_link_patterns = [
-            r"\[.*?\]\((?:t\.me|telegram\.me|tg://).*?\)",  # Markdown с Telegram ссылкой
-            r'<a\s+[^>]*href="(?:t\.me|telegram\.me|tg://)[^"]*"[^>]*>.*?</a>',  # HTML с Telegram ссылкой
-        ]
+    def scan_stats(self) -> dict:
+        """
+        Доля проверок, переданных в пул, и время ожидания в очереди пула
+        """
+        return self.__scan_executor.stats()
+
+    async def message_contains_links(self, message) -> bool:
+        """
+        Проверяет наличие ссылок в тексте или подписи сообщения.
+        Сначала используются сущности, которые уже разметил Telegram,
+        регулярные выражения применяются только к неразмеченному тексту
+        (обфусцированные и некликабельные ссылки)
+        """
+        if message.text:
+            text = message.text
+            entities = message.parse_entities(LINK_ENTITY_TYPES)
+        else:
+            text = message.caption
+            entities = message.parse_caption_entities(LINK_ENTITY_TYPES)
 
-        for pattern in telegram_link_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+        for entity, entity_text in entities.items():
+            link = entity.url if entity.type == MessageEntity.TEXT_LINK else entity_text
+            if self.__domain_rules.action(message.chat_id, link) != ALLOW:
                 return True
 
-        # Теперь проверяем обычные ссылки в очищенном тексте
-        # Очистка текста от разметки для поиска обычных ссылок
-        # Удаление Markdown ссылок [текст](URL)
-        clean_text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
-        # Удаление HTML ссылок <a href="URL">текст</a>
-        clean_text = re.sub(
-            r'<a\s+[^>]*href="[^"]*"[^>]*>([^<]+)</a>',
-            r"\1",
-            clean_text,
-            flags=re.IGNORECASE,
-        )
-        # Удаление остальных HTML тегов
-        clean_text = re.sub(r"<[^>]+>", "", clean_text)
-
-        # Комбинированный паттерн для всех типов ссылок
-        link_patterns = [
-            # 1. URL с протоколом (http, https, ftp, ftps)
-            r'(?:https?|ftp|ftps)://[^\s<>"\'\[\]{}|\\^`]+',
-            # 2. www.домены (начинающиеся с www.)
-            r'\bwww\.[^\s<>"\'\[\]{}|\\^`]+',
-            # 3. Домены без протокола (с популярными TLD)
-            r"\b(?!@)(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+"
-            r"(?:com|org|net|edu|gov|mil|int|info|biz|ru|рф|ua|by|kz|"
-            r"uk|de|fr|es|it|pl|cz|sk|hu|ro|bg|gr|tr|ir|il|sa|ae|"
-            r"in|cn|jp|kr|vn|th|id|my|ph|sg|au|nz|ca|mx|br|ar|cl|co|"
-            r"[a-z]{2,})"
-            r"(?::\d{2,5})?"
-            r"(?:/[\w\-\.~!$&\'()*+,;=:@%]*)?"
-            r'(?:\?[^\s<>"\']*)?'
-            r'(?:#[^\s<>"\']*)?',
-            # 4. Telegram-специфичные ссылки
-            r"\b(?:t\.me/|telegram\.me/|tg://|@)[a-zA-Z0-9_][a-zA-Z0-9_\-/]*",
-            # 5. IP-адреса с портами/путями
-            r"\b(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])\."
-            r"(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])\."
-            r"(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])\."
-            r"(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])"
-            r"(?::\d{2,5})?"
-            r"(?:/[\w\-\.~!$&\'()*+,;=:@%]*)?",
-        ]
+        return await self.contains_links(text, message.chat_id)
 
-        # Объединяем все паттерны в один
-        combined_pattern = re.compile(
-            "|".join(f"({pattern})" for pattern in link_patterns), re.IGNORECASE
-        )
+    async def check_user_admin(self, chat_id: int, user_id: int, bot) -> bool:
+        return await self.__admin_cache.is_admin(bot, chat_id, user_id)
 
-        # Ищем совпадения
-        matches = combined_pattern.finditer(clean_text)
-
-        # Список исключений (ложные срабатывания)
-        exceptions = {
-            "example.com",
-            "example.org",
-            "example.net",
-            "example.edu",
-            "test.com",
-            "test.org",
-            "demo.com",
-            "sample.com",
-            "localhost",
-            "localdomain",
-            "127.0.0.1",
-            "0.0.0.0",
-            "api",
-            "www",
-            "http",
-            "https",
-            "ftp",
-        }
+    async def chat_member_updated(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ):
+        """
+        Обновляет кэш администраторов при повышении или понижении участника
+        """
+        self.__admin_cache.apply_update(update.chat_member)
 
-        # Проверяем каждое найденное совпадение
-        for match in matches:
-            for group_num in range(1, len(match.groups()) + 1):
-                match_text = match.group(group_num)
-                if match_text:
-                    # Приводим к нижнему регистру для проверки
-                    match_lower = match_text.lower().strip()
-
-                    # Проверяем исключения
-                    is_exception = False
-                    for exc in exceptions:
-                        # Проверяем, содержит ли исключение как подстроку
-                        if exc in match_lower:
-                            # Если это полное совпадение или часть домена
-                            if (
-                                exc == match_lower
-                                or match_lower.endswith("." + exc)
-                                or f".{exc}." in match_lower
-                                or match_lower.startswith(exc + ".")
-                            ):
-                                is_exception = True
-                                break
-
-                    if not is_exception:
-                        # Дополнительные проверки для уменьшения ложных срабатываний
-
-                        # Проверка на email (исключаем)
-                        if re.match(
-                            r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$",
-                            match_text,
-                        ):
-                            continue
-
-                        # Проверка на слишком короткие "ссылки"
-                        if len(match_text) < 5:
-                            continue
-
-                        # Проверка на случайные слова с точками
-                        if "." in match_text and not any(
-                            c in match_text for c in ["/", ":", "@"]
-                        ):
-                            parts = match_text.split(".")
-                            # Если это просто слово.точка.слово без других признаков ссылки
-                            if (
-                                len(parts) == 2
-                                and len(parts[0]) < 4
-                                and len(parts[1]) < 4
-                            ):
-                                continue
-
-                        # Если дошли сюда, значит это похоже на настоящую ссылку
-                        return True
-
-        # Проверка на скрытые ссылки с использованием Unicode или обфускации
-        suspicious_patterns = [
-            r"[а-яА-ЯёЁ]*\.(?:рф|com|org|net)[а-яА-ЯёЁ]*",  # Кириллические домены
-            r"\b[\w\-]+\.[\w\-]+\.[\w\-]+\b",  # Многоточечные структуры
-        ]
+    async def my_chat_member_updated(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ):
+        """
+        Обновляет список групп, когда бота добавляют в группу или исключают из нее
+        """
+        try:
+            chat = update.effective_chat
+            if chat.type not in ["group", "supergroup"]:
+                return
 
-        for pattern in suspicious_patterns:
-            if re.search(pattern, clean_text, re.IGNORECASE):
-                # Проверяем, не является ли это обычным текстом
-                suspicious_match = re.search(pattern, clean_text, re.IGNORECASE)
-                if suspicious_match:
-                    match_text = suspicious_match.group()
-                    # Исключаем очевидные не-ссылки
-                    if not any(
-                        exc in match_text.lower()
-                        for exc in ["example", "test", "localhost"]
-                    ):
-                        # Проверяем, похоже ли это на домен
-                        if re.search(r"\.[a-z]{2,}$", match_text, re.IGNORECASE):
-                            return True
-
-        return False
+            status = update.my_chat_member.new_chat_member.status
+            if status in (ChatMember.LEFT, ChatMember.BANNED):
+                await self.__groups.remove([chat.id])
+                print(f"👋 Бот исключен из группы: {chat.title} (ID: {chat.id})")
+            else:
+                await self.__groups.upsert(chat.id, chat.title)
+        except Exception as e:
+            print(f"❌ Ошибка при обновлении списка групп: {e}")
 
-    async def check_user_admin(self, chat_id: int, user_id: int, bot) -> bool:
+    async def register_group(self, chat):
+        """
+        Добавляет группу, о которой бот еще не знает
+        (например, добавленную до появления списка групп)
+        """
+        if chat.type not in ["group", "supergroup"] or chat.id in self.__groups:
+            return
         try:
-            chat_member = await bot.get_chat_member(chat_id, user_id)
-            return chat_member.status in ["administrator", "creator"]
+            await self.__groups.upsert(chat.id, chat.title)
         except Exception as e:
-            return False
+            print(f"❌ Ошибка при добавлении группы {chat.title}: {e}")
 
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         message = update.message
+        await self.register_group(update.effective_chat)
 
         # Проверяем тип сообщения
         message_has_media = bool(
@@ -345,87 +796,122 @@ class BOT:
         )
 
         # Проверяем текст или подпись к медиа
-        text_to_check = None
-        if message.text:
-            if message.text_html_urled:
-                text_to_check = message.text_html_urled
-            else:
-                text_to_check = message.text
-        elif message.caption:
-            link = None
-
-            # Проверка ссылки
-            if len(message.caption_entities) > 0:
-                for option in message.caption_entities:
-                    if option.type == "text_link" or option.type == "url":
-                        link = option.url
-
-            text_to_check = f"{message.caption} {link}"
+        text_to_check = message.text or message.caption
 
         # Если нет текста для проверки и нет медиа, выходим
         if not text_to_check and not message_has_media:
             return
 
-        chat_id = message.chat_id
-        user_id = message.from_user.id
+        # Сообщения альбома проверяются вместе после получения всех частей
+        if message.media_group_id:
+            self.__album_buffer.add(message, context)
+            return
+
+        await self.moderate_messages([message], context)
+
+    async def moderate_messages(self, messages: list, context):
+        """
+        Проверяет сообщение или альбом как единое целое и удаляет его
+        целиком, если хотя бы одна часть нарушает правила
+        """
+        first = messages[0]
+        chat_id = first.chat_id
+        user_id = first.from_user.id
+
+        # Проверяем флуд и повторы одного и того же сообщения
+        # (альбом учитывается как одно сообщение — по части с подписью)
+        flood_message = next((m for m in messages if m.caption), first)
+        violation = self.__flood_detector.check(
+            chat_id, user_id, message_fingerprint(flood_message)
+        )
+        violation = (violation, None) if violation else None
+
+        for message in messages:
+            if violation:
+                break
+            violation = await self.find_violation(message)
+
+        if not violation:
+            return
+
+        is_admin = await self.check_user_admin(chat_id, user_id, context.bot)
+        if not is_admin:
+            reason, detail = violation
+            await self.delete_messages_with_notice(messages, context, reason, detail)
 
+    async def find_violation(self, message) -> tuple[str, Optional[str]] | None:
+        """
+        Проверяет содержимое сообщения, возвращает (причина, подробности)
+        """
         # Проверяем наличие ссылок в тексте/подписи
-        if text_to_check and self.contains_links(text_to_check):
-            is_admin = await self.check_user_admin(chat_id, user_id, context.bot)
-            if not is_admin:
-                await self.delete_message_with_notice(message, context)
-                return
+        text = message.text or message.caption
+        if text and await self.message_contains_links(message):
+            return "link", None
+
+        # Проверяем фото по списку изображений, отмеченных как реклама
+        if message.photo and await self.__spam_images.contains(
+            message.get_bot(), message.photo
+        ):
+            return "spam_image", None
 
         # Дополнительная проверка для документов (например, PDF с рекламой)
         if message.document:
             document = message.document
             # Проверяем название файла
-            if document.file_name and self.contains_links(document.file_name):
-                is_admin = await self.check_user_admin(chat_id, user_id, context.bot)
-                if not is_admin:
-                    await self.delete_message_with_notice(message, context)
-                    return
+            if document.file_name and await self.contains_links(
+                document.file_name, message.chat_id
+            ):
+                return "link", None
 
             # Проверяем MIME тип на наличие потенциально опасных файлов
-            suspicious_mime_types = [
-                "application/vnd.android.package-archive",  # APK
-                "application/x-msdownload",  # EXE
-                "application/x-executable",
-                "application/x-sh",
-                "application/x-shellscript",
-                "text/html",  # HTML файлы могут содержать скрытые ссылки
-                "application/xhtml+xml",
-                "application/vnd.ms-powerpoint",
-                "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-            ]
+            if document.mime_type in SUSPICIOUS_MIME_TYPES:
+                return "mime", document.mime_type
+
+            # Проверяем содержимое текстовых документов
+            if (
+                self.__document_inspector
+                and await self.__document_inspector.contains_links(
+                    message.get_bot(), document
+                )
+            ):
+                return "document", None
 
-            if document.mime_type in suspicious_mime_types:
-                is_admin = await self.check_user_admin(chat_id, user_id, context.bot)
-                if not is_admin:
-                    notice_text = (
-                        f"❌ {message.from_user.mention_html()} ваше сообщение в группе было удалено, "
-                        f"так как содержит файл потенциально опасного типа ({document.mime_type}).\n\n"
-                        f"Такие файлы могут отправлять только администратор группы"
-                    )
-                    await message.delete()
-                    notice = await context.bot.send_message(
-                        chat_id=chat_id,
-                        text=notice_text,
-                        parse_mode="HTML",
-                    )
-                    await asyncio.sleep(10)
-                    await notice.delete()
-                    return
+        return None
 
-    async def delete_message_with_notice(self, message, context):
-        """Удаляет сообщение и отправляет уведомление"""
+    async def delete_messages_with_notice(
+        self, messages: list, context, reason="link", detail=None
+    ):
+        """
+        Удаляет сообщения одного пользователя (одним запросом) и отправляет
+        уведомление. Повторные нарушения пользователя, пока уведомление
+        еще висит в чате, новых уведомлений не вызывают
+        """
+        message = messages[0]
         try:
-            await message.delete()
+            if len(messages) == 1:
+                await message.delete()
+            else:
+                await context.bot.delete_messages(
+                    message.chat_id, [m.message_id for m in messages]
+                )
+            self.__audit.message_deleted(messages, reason, detail)
 
+            notice_key = (message.chat_id, message.from_user.id)
+            now = time.monotonic()
+            if self.__active_notices.get(notice_key, 0) > now:
+                return
+            self.__active_notices = {
+                key: expires_at
+                for key, expires_at in self.__active_notices.items()
+                if expires_at > now
+            }
+            self.__active_notices[notice_key] = now + NOTICE_LIFETIME
+
+            cause, hint = NOTICE_REASONS[reason]
             notice_text = (
                 f"❌ {message.from_user.mention_html()} ваше сообщение в группе было удалено, "
-                f"так как содержит ссылку.\n\n"
-                f"Ссылки могут отправлять только администратор группы"
+                f"так как {cause.format(detail=detail)}.\n\n"
+                f"{hint}"
             )
 
             notice = await context.bot.send_message(
@@ -435,21 +921,160 @@ class BOT:
             )
 
             # Удаляем уведомление через 10 секунд
-            await asyncio.sleep(10)
-            await notice.delete()
+            self.__deletion_queue.schedule(
+                message.chat_id, notice.message_id, NOTICE_LIFETIME
+            )
 
         except Exception as e:
             print(f"❌ Ошибка при удалении сообщения: {e}")
 
+    def campaign_keyboard(self, campaign: str):
+        """
+        Кнопки под сообщением рассылки
+        """
+        if campaign == "morning":
+            return [
+                [
+                    InlineKeyboardButton(
+                        "✅ Открыть",
+                        url=f"https://t.me/{os.getenv('USERNAME_BOT')}?start=reminder_morning",
+                    ),
+                ],
+            ]
+        if campaign == "weekly":
+            return [
+                [
+                    InlineKeyboardButton(
+                        "🆕 Смотреть новинки",
+                        url=f"https://t.me/{os.getenv('USERNAME_BOT')}?start=weekly_new",
+                    ),
+                    InlineKeyboardButton(
+                        "🏷️ Акции",
+                        url=f"https://t.me/{os.getenv('USERNAME_BOT')}?start=sales",
+                    ),
+                ],
+                [
+                    InlineKeyboardButton(
+                        "📞 Заказать звонок", callback_data="request_call"
+                    ),
+                    InlineKeyboardButton(
+                        "🗺️ Как добраться",
+                        url=os.getenv("URL_WEB") + "/contacts",
+                    ),
+                ],
+            ]
+        return [
+            [
+                InlineKeyboardButton("✅ Открыть", url=os.getenv("URL_WEB")),
+            ],
+        ]
+
+    async def broadcast_to_groups(self, campaign: str, message: str):
+        """
+        Отправка сообщения во все группы через общий движок рассылки.
+        Рассылка записывается в журнал доставки: после перезапуска она
+        продолжается только по группам, которые еще не получили сообщение
+        """
+        name = CAMPAIGN_NAMES[campaign]
+        if campaign in self.__running_campaigns:
+            print(f"⚠️ {name} уже выполняется")
+            return
+
+        self.__running_campaigns.add(campaign)
+        try:
+            run_date = datetime.now(ZoneInfo(TIMEZONE)).date()
+            message, finished, resumed = await self.__ledger.open_run(
+                campaign, run_date, message
+            )
+            if finished:
+                print(f"⚠️ {name} за {run_date} уже отправлено")
+                return
+
+            delivered = (
+                await self.__ledger.delivered_groups(campaign, run_date)
+                if resumed
+                else set()
+            )
+            groups = {
+                chat_id: title
+                for chat_id, title in self.__groups.items()
+                if chat_id not in delivered
+            }
+
+            result = await self.__broadcaster.broadcast(
+                self.__app.bot,
+                list(groups),
+                on_sent=lambda chat_id: self.__ledger.record(
+                    campaign, run_date, chat_id
+                ),
+                text=message,
+                parse_mode="HTML",
+                reply_markup=InlineKeyboardMarkup(self.campaign_keyboard(campaign)),
+                rate_limit_args=PRIORITY_BROADCAST,
+            )
+
+            for chat_id, e in result.failed.items():
+                print(
+                    f"❌ Ошибка при отправке в группу {groups.get(chat_id, chat_id)}: {e}"
+                )
+                self.__audit.delivery_failed(campaign, chat_id, e)
+            for old_id, new_id in result.migrated.items():
+                self.__audit.add(
+                    "group_migrated", old_id, reason=campaign, detail=str(new_id)
+                )
+            for chat_id in result.dead:
+                self.__audit.add("group_removed", chat_id, reason=campaign)
+
+            # Группы, из которых бот удален, и преобразованные в супергруппы
+            # обновляются после рассылки одним запросом
+            try:
+                await self.__groups.migrate(result.migrated)
+                await self.__groups.remove(result.dead)
+            except Exception as e:
+                print(f"❌ Ошибка при обновлении списка групп после рассылки: {e}")
+            if result.migrated:
+                print(f"🔀 Группы перенесены на новые chat_id: {len(result.migrated)}")
+            if result.dead:
+                print(f"🗑️ Удалено недоступных групп: {len(result.dead)}")
+
+            await self.__ledger.finish_run(campaign, run_date)
+
+            print(
+                f"✅ {name} отправлено в {len(result.sent)} из {len(groups)} групп "
+                f"за {result.duration:.1f} с"
+            )
+        finally:
+            self.__running_campaigns.discard(campaign)
+
+    async def resume_broadcasts(self):
+        """
+        Продолжение рассылок, прерванных перезапуском бота
+        """
+        try:
+            run_date = datetime.now(ZoneInfo(TIMEZONE)).date()
+            for campaign, message in await self.__ledger.unfinished_runs(run_date):
+                print(f"🔁 Продолжаем рассылку: {CAMPAIGN_NAMES[campaign]}")
+                await self.broadcast_to_groups(campaign, message)
+        except Exception as e:
+            print(f"❌ Ошибка при продолжении рассылок: {e}")
+
+    async def send_campaign(self, campaign: str):
+        """
+        Запуск рассылки по названию кампании
+        """
+        senders = {
+            "morning": self.send_morning_reminder,
+            "dinner": self.send_dinner_reminder,
+            "evening": self.send_evening_reminder,
+            "weekly": self.send_weekly_update,
+        }
+        await senders[campaign]()
+
     async def send_morning_reminder(self):
         """
         Отправка утреннего напоминания во все группы
         """
         try:
-            cursor = self.__db_connect.cursor()
-            cursor.execute("SELECT chat_id, title FROM telegram_groups")
-            groups = cursor.fetchall()
-
             morning_messages = [
                 "🌅 Доброе утро, друзья! Я бот всегда готов помочь вам с выбором мебели.\n\n"
                 "☀️ Добрый день начинается с хорошего настроения и удобной мебели!\n\n"
@@ -460,34 +1085,7 @@ class BOT:
 
             message = random.choice(morning_messages)
 
-            for chat_id, title in groups:
-                try:
-                    keyboard = [
-                        [
-                            InlineKeyboardButton(
-                                "✅ Открыть",
-                                url=f"https://t.me/{os.getenv('USERNAME_BOT')}?start=reminder_morning",
-                            ),
-                        ],
-                    ]
-
-                    await self.__app.bot.send_message(
-                        chat_id=chat_id,
-                        text=message,
-                        parse_mode="HTML",
-                        reply_markup=InlineKeyboardMarkup(keyboard),
-                    )
-                    print(f"✅ Утреннее напоминание отправлено в группу: {title}")
-                except Exception as e:
-                    print(f"❌ Ошибка при отправке в группу {title}: {e}")
-                    # Если бот удален из группы, удаляем запись из БД
-                    if "Chat not found" in str(e) or "bot was kicked" in str(e):
-                        cursor.execute(
-                            "DELETE FROM telegram_groups WHERE chat_id = %s", (chat_id,)
-                        )
-                        self.__db_connect.commit()
-
-            cursor.close()
+            await self.broadcast_to_groups("morning", message)
 
         except Exception as e:
             print(f"❌ Ошибка в утреннем напоминании: {e}")
@@ -497,10 +1095,6 @@ class BOT:
         Отправка вечернего напоминания во все группы
         """
         try:
-            cursor = self.__db_connect.cursor()
-            cursor.execute("SELECT chat_id, title FROM telegram_groups")
-            groups = cursor.fetchall()
-
             evening_messages = [
                 "🌙 Добрый вечер! Время подумать об уюте в вашем доме.\n"
                 "🤖 Я бот всегда готов помочь вам с выбором мебели.\n\n"
@@ -514,33 +1108,7 @@ class BOT:
 
             message = random.choice(evening_messages)
 
-            for chat_id, title in groups:
-                try:
-                    keyboard = [
-                        [
-                            InlineKeyboardButton(
-                                "✅ Открыть", url=os.getenv("URL_WEB")
-                            ),
-                        ],
-                    ]
-
-                    await self.__app.bot.send_message(
-                        chat_id=chat_id,
-                        text=message,
-                        parse_mode="HTML",
-                        reply_markup=InlineKeyboardMarkup(keyboard),
-                    )
-                    print(f"✅ Вечернее напоминание отправлено в группу: {title}")
-                except Exception as e:
-                    print(f"❌ Ошибка при отправке в группу {title}: {e}")
-                    # Если бот удален из группы, удаляем запись из БД
-                    if "Chat not found" in str(e) or "bot was kicked" in str(e):
-                        cursor.execute(
-                            "DELETE FROM telegram_groups WHERE chat_id = %s", (chat_id,)
-                        )
-                        self.__db_connect.commit()
-
-            cursor.close()
+            await self.broadcast_to_groups("evening", message)
 
         except Exception as e:
             print(f"❌ Ошибка в вечернем напоминании: {e}")
@@ -550,10 +1118,6 @@ class BOT:
         Отправка обеденный напоминания во все группы
         """
         try:
-            cursor = self.__db_connect.cursor()
-            cursor.execute("SELECT chat_id, title FROM telegram_groups")
-            groups = cursor.fetchall()
-
             dinner_messages = [
                 "🕛 Добрый день! Идеальное время для обеденного перерыва.\n"
                 "🤖 Я бот всегда готов помочь вам с выбором мебели.\n\n"
@@ -573,33 +1137,7 @@ class BOT:
 
             message = random.choice(dinner_messages)
 
-            for chat_id, title in groups:
-                try:
-                    keyboard = [
-                        [
-                            InlineKeyboardButton(
-                                "✅ Открыть", url=os.getenv("URL_WEB")
-                            ),
-                        ],
-                    ]
-
-                    await self.__app.bot.send_message(
-                        chat_id=chat_id,
-                        text=message,
-                        parse_mode="HTML",
-                        reply_markup=InlineKeyboardMarkup(keyboard),
-                    )
-                    print(f"✅ Обеденное напоминание отправлено в группу: {title}")
-                except Exception as e:
-                    print(f"❌ Ошибка при отправке в группу {title}: {e}")
-                    # Если бот удален из группы, удаляем запись из БД
-                    if "Chat not found" in str(e) or "bot was kicked" in str(e):
-                        cursor.execute(
-                            "DELETE FROM telegram_groups WHERE chat_id = %s", (chat_id,)
-                        )
-                        self.__db_connect.commit()
-
-            cursor.close()
+            await self.broadcast_to_groups("dinner", message)
 
         except Exception as e:
             print(f"❌ Ошибка в обеденном напоминании: {e}")
@@ -609,10 +1147,6 @@ class BOT:
         Еженедельное обновление о новинках и акциях
         """
         try:
-            cursor = self.__db_connect.cursor()
-            cursor.execute("SELECT chat_id, title FROM telegram_groups")
-            groups = cursor.fetchall()
-
             weekly_messages = [
                 "📢 Новая неделя - новые возможности обновить интерьер!\n\n"
                 "✨ Не упустите шанс сделать свой дом лучше!",
@@ -623,82 +1157,46 @@ class BOT:
 
             message = random.choice(weekly_messages)
 
-            for chat_id, title in groups:
-                try:
-                    keyboard = [
-                        [
-                            InlineKeyboardButton(
-                                "🆕 Смотреть новинки",
-                                url=f"https://t.me/{os.getenv('USERNAME_BOT')}?start=weekly_new",
-                            ),
-                            InlineKeyboardButton(
-                                "🏷️ Акции",
-                                url=f"https://t.me/{os.getenv('USERNAME_BOT')}?start=sales",
-                            ),
-                        ],
-                        [
-                            InlineKeyboardButton(
-                                "📞 Заказать звонок", callback_data="request_call"
-                            ),
-                            InlineKeyboardButton(
-                                "🗺️ Как добраться",
-                                url=os.getenv("URL_WEB") + "/contacts",
-                            ),
-                        ],
-                    ]
-
-                    await self.__app.bot.send_message(
-                        chat_id=chat_id,
-                        text=message,
-                        parse_mode="HTML",
-                        reply_markup=InlineKeyboardMarkup(keyboard),
-                    )
-                    print(f"✅ Еженедельное обновление отправлено в группу: {title}")
-                except Exception as e:
-                    print(f"❌ Ошибка при отправке в группу {title}: {e}")
-                    # Если бот удален из группы, удаляем запись из БД
-                    if "Chat not found" in str(e) or "bot was kicked" in str(e):
-                        cursor.execute(
-                            "DELETE FROM telegram_groups WHERE chat_id = %s", (chat_id,)
-                        )
-                        self.__db_connect.commit()
-
-            cursor.close()
+            await self.broadcast_to_groups("weekly", message)
 
         except Exception as e:
             print(f"❌ Ошибка в еженедельном обновлении: {e}")
 
     def setup_scheduler(self):
         """
-        Настройка планировщика для отправки напоминаний
+        Настройка планировщика для отправки напоминаний.
+        Задачи хранятся в базе данных, поэтому пропущенный из-за перезапуска
+        запуск выполняется один раз после старта, если не вышел срок misfire_grace_time
         """
         try:
-            # Создаем планировщик с собственным event loop
-            self.__scheduler = AsyncIOScheduler(timezone="Asia/Krasnoyarsk")
-
-            # Утреннее напоминание в 9:00 каждый день
-            self.__scheduler.add_job(
-                self.send_morning_reminder,
-                CronTrigger(hour=9, minute=0, timezone="Asia/Krasnoyarsk"),
-                id="morning_reminder",
-                replace_existing=True,
+            self.__scheduler = AsyncIOScheduler(
+                timezone=TIMEZONE,
+                jobstores={"default": PostgresJobStore()},
+                job_defaults={
+                    "misfire_grace_time": int(
+                        os.getenv("SCHEDULER_MISFIRE_GRACE", 3600)
+                    ),
+                    "coalesce": os.getenv("SCHEDULER_COALESCE", "1") == "1",
+                },
             )
 
-            # Обеденное напоминание в 12:00 каждый день
-            self.__scheduler.add_job(
-                self.send_dinner_reminder,
-                CronTrigger(hour=12, minute=0, timezone="Asia/Krasnoyarsk"),
-                id="dinner_reminder",
-                replace_existing=True,
-            )
-
-            # Вечернее напоминание в 18:00 каждый день
-            self.__scheduler.add_job(
-                self.send_evening_reminder,
-                CronTrigger(hour=18, minute=0, timezone="Asia/Krasnoyarsk"),
-                id="evening_reminder",
-                replace_existing=True,
-            )
+            self.__scheduled_jobs = {
+                # Утреннее напоминание в 9:00 каждый день
+                "morning_reminder": (
+                    "morning",
+                    CronTrigger(hour=9, minute=0, timezone=TIMEZONE),
+                ),
+                # Обеденное напоминание в 12:00 каждый день
+                "dinner_reminder": (
+                    "dinner",
+                    CronTrigger(hour=12, minute=0, timezone=TIMEZONE),
+                ),
+                # Вечернее напоминание в 18:00 каждый день
+                "evening_reminder": (
+                    "evening",
+                    CronTrigger(hour=18, minute=0, timezone=TIMEZONE),
+                ),
+            }
 
             print("✅ Планировщик настроен")
             print("📅 Расписание:")
@@ -709,13 +1207,35 @@ class BOT:
         except Exception as err:
             print(f"❌ Ошибка настройки планировщика: {err}")
 
+    def sync_scheduled_jobs(self):
+        """
+        Приводит сохраненные задачи в соответствие с расписанием.
+        Существующие задачи не пересоздаются, чтобы не потерять
+        время пропущенного запуска
+        """
+        for job in self.__scheduler.get_jobs():
+            if job.id not in self.__scheduled_jobs:
+                job.remove()
+
+        for job_id, (campaign, trigger) in self.__scheduled_jobs.items():
+            job = self.__scheduler.get_job(job_id)
+            if job is None:
+                self.__scheduler.add_job(
+                    run_campaign, trigger, args=[campaign], id=job_id
+                )
+            elif str(job.trigger) != str(trigger):
+                job.reschedule(trigger)
+
     async def start_scheduler(self):
         """
         Запуск планировщика после запуска бота
         """
         try:
             if self.__scheduler and not self.__scheduler.running:
-                self.__scheduler.start()
+                # Задачи синхронизируются до первой обработки расписания
+                self.__scheduler.start(paused=True)
+                self.sync_scheduled_jobs()
+                self.__scheduler.resume()
                 print("✅ Планировщик запущен")
 
                 # Проверка запланированных задач
@@ -738,13 +1258,83 @@ class BOT:
         except Exception as e:
             print(f"❌ Ошибка при остановке планировщика: {e}")
 
+    async def run_webhook(self):
+        """
+        Прием обновлений через вебхук вместо long polling.
+        Вебхук регистрируется в Telegram, только если задан WEBHOOK_URL:
+        при нескольких экземплярах за балансировщиком достаточно одного,
+        а для локальной проверки можно отправлять записанные обновления POST-запросом
+        """
+        secret_token = os.getenv("WEBHOOK_SECRET_TOKEN")
+        if not secret_token:
+            print("❌ WEBHOOK_SECRET_TOKEN не задан, вебхук не запущен")
+            return
+        server = WebhookServer(
+            self.__app, os.getenv("WEBHOOK_PATH", "telegram"), secret_token
+        )
+
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+
+        await self.__app.initialize()
+        await self.post_init(self.__app)
+        try:
+            webhook_url = os.getenv("WEBHOOK_URL")
+            if webhook_url:
+                await self.__app.bot.set_webhook(
+                    url=webhook_url,
+                    allowed_updates=Update.ALL_TYPES,
+                    secret_token=secret_token,
+                )
+                print(f"✅ Вебхук зарегистрирован: {webhook_url}")
+
+            await self.__app.start()
+            await server.start(
+                os.getenv("WEBHOOK_LISTEN", "0.0.0.0"),
+                int(os.getenv("WEBHOOK_PORT", 8443)),
+            )
+            await stop_event.wait()
+        finally:
+            await server.stop()
+            if self.__app.running:
+                await self.__app.stop()
+            await self.post_stop(self.__app)
+            await self.__app.shutdown()
+            await self.post_shutdown(self.__app)
+
     def start(self):
         try:
             print("🤖 ЗАПУСК БОТА...")
 
             # Регистрация обработчиков
             self.__app.add_handler(CommandHandler("start", self.command_start))
+            self.__app.add_handler(
+                CommandHandler("attribution", self.command_attribution)
+            )
+            self.__app.add_handler(CommandHandler("stats", self.command_stats))
+            self.__app.add_handler(
+                CommandHandler("spam_image", self.command_spam_image)
+            )
+            self.__app.add_handler(
+                CommandHandler(
+                    ["allow_domain", "deny_domain", "remove_domain"],
+                    self.command_domain_rule,
+                )
+            )
+            self.__app.add_handler(CommandHandler("domains", self.command_domains))
             self.__app.add_handler(CallbackQueryHandler(self.callback_handler))
+            self.__app.add_handler(
+                ChatMemberHandler(
+                    self.chat_member_updated, ChatMemberHandler.CHAT_MEMBER
+                )
+            )
+            self.__app.add_handler(
+                ChatMemberHandler(
+                    self.my_chat_member_updated, ChatMemberHandler.MY_CHAT_MEMBER
+                )
+            )
 
             # Обработчик для ВСЕХ сообщений (включая медиа)
             self.__app.add_handler(
@@ -771,16 +1361,15 @@ class BOT:
             asyncio.set_event_loop(loop)
 
             try:
-                # Запускаем планировщик
-                if self.__scheduler and not self.__scheduler.running:
-                    loop.run_until_complete(self.start_scheduler())
-
                 print("🚀 Запуск бота...")
-                # Запуск бота с нашим event loop
-                self.__app.run_polling(
-                    allowed_updates=Update.ALL_TYPES,
-                    close_loop=False,
-                )
+                if os.getenv("BOT_MODE", "polling") == "webhook":
+                    loop.run_until_complete(self.run_webhook())
+                else:
+                    # Запуск бота с нашим event loop
+                    self.__app.run_polling(
+                        allowed_updates=Update.ALL_TYPES,
+                        close_loop=False,
+                    )
 
             finally:
                 # Останавливаем планировщик
@@ -793,3 +1382,12 @@ class BOT:
             print("\n🛑 Бот остановлен пользователем")
         except BaseException as err:
             print(f"❌ При запуске бота произошла ошибка: {err}")
+
+
+async def run_campaign(campaign: str):
+    """
+    Точка входа задач планировщика.
+    Задачи хранятся в базе данных, поэтому ссылаются на функцию модуля,
+    а не на метод экземпляра BOT
+    """
+    await BOT.instance.send_campaign(campaign)
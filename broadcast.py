@@ -0,0 +1,125 @@
+import time
+import asyncio
+from telegram.error import BadRequest, ChatMigrated, Forbidden, RetryAfter
+
+
+class BroadcastResult:
+    """
+    Итог рассылки
+    """
+
+    def __init__(self):
+        self.sent: list[int] = []
+        self.failed: dict[int, Exception] = {}
+        # Чаты, в которые бот больше не может писать (исключен, чат удален)
+        self.dead: list[int] = []
+        # Группы, преобразованные в супергруппы: старый chat_id -> новый
+        self.migrated: dict[int, int] = {}
+        self.duration = 0.0
+
+
+def is_chat_gone(error: Exception) -> bool:
+    """
+    Проверяет, что ошибка означает потерю доступа к чату навсегда
+    """
+    if isinstance(error, Forbidden):
+        # bot was kicked, bot is not a member, group chat was deactivated
+        return True
+    if isinstance(error, BadRequest):
+        return "chat not found" in error.message.lower()
+    return False
+
+
+class Broadcaster:
+    """
+    Рассылка сообщений по группам с ограниченной параллельностью.
+    Соблюдает лимит на один чат и возвращает сообщение в очередь при RetryAfter.
+    Группа, преобразованная в супергруппу, получает сообщение по новому chat_id,
+    а недоступные чаты собираются в result.dead для удаления одним запросом.
+    Общий лимит Telegram (~30 запросов в секунду) и паузы после RetryAfter
+    обеспечивает OutboundScheduler, через который проходят все запросы бота.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 20,
+        chat_interval: float = 3,
+        max_retries: int = 3,
+    ):
+        self.__concurrency = concurrency
+        self.__chat_interval = chat_interval
+        self.__max_retries = max_retries
+        self.__chat_next_send: dict[int, float] = {}
+
+    async def broadcast(
+        self, bot, chat_ids, on_sent=None, **message_kwargs
+    ) -> BroadcastResult:
+        """
+        Отправляет одно сообщение во все указанные чаты.
+        После каждой успешной отправки ожидается корутина on_sent(chat_id):
+        обработчик берет следующий чат только после нее
+        """
+        result = BroadcastResult()
+        started_at = time.monotonic()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for chat_id in chat_ids:
+            queue.put_nowait((chat_id, 0))
+
+        async def worker():
+            while True:
+                chat_id, attempt = await queue.get()
+                try:
+                    await self.__wait_chat(chat_id)
+                    await bot.send_message(chat_id=chat_id, **message_kwargs)
+                    result.sent.append(chat_id)
+                    if on_sent:
+                        await on_sent(chat_id)
+                except RetryAfter as e:
+                    if attempt < self.__max_retries:
+                        queue.put_nowait((chat_id, attempt + 1))
+                    else:
+                        result.failed[chat_id] = e
+                except ChatMigrated as e:
+                    if attempt < self.__max_retries:
+                        result.migrated[chat_id] = e.new_chat_id
+                        queue.put_nowait((e.new_chat_id, attempt + 1))
+                    else:
+                        result.failed[chat_id] = e
+                except Exception as e:
+                    result.failed[chat_id] = e
+                    if is_chat_gone(e):
+                        result.dead.append(chat_id)
+                finally:
+                    queue.task_done()
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(self.__concurrency, queue.qsize()))
+        ]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        result.duration = time.monotonic() - started_at
+        self.__forget_idle_chats()
+        return result
+
+    async def __wait_chat(self, chat_id: int):
+        # Лимит на один чат: не чаще одного сообщения за chat_interval
+        now = time.monotonic()
+        send_at = max(now, self.__chat_next_send.get(chat_id, 0))
+        self.__chat_next_send[chat_id] = send_at + self.__chat_interval
+        if send_at > now:
+            await asyncio.sleep(send_at - now)
+
+    def __forget_idle_chats(self):
+        now = time.monotonic()
+        self.__chat_next_send = {
+            chat_id: send_at
+            for chat_id, send_at in self.__chat_next_send.items()
+            if send_at > now
+        }
@@ -0,0 +1,76 @@
+import time
+from datetime import datetime, timezone
+from psycopg2.extras import execute_values
+from batch_writer import BatchWriter
+
+
+class CallRequests:
+    """
+    Заявки на обратный звонок (кнопка «Заказать звонок» в рассылке).
+    Повторные нажатия одного пользователя в течение dedupe_window секунд
+    не создают новых заявок, заявки записываются в call_requests пакетами.
+    """
+
+    def __init__(
+        self,
+        db,
+        dedupe_window: float = 3600,
+        batch_size: int = 100,
+        flush_interval: float = 2.0,
+    ):
+        self.__db = db
+        self.__dedupe_window = dedupe_window
+        self.__recent: dict[int, float] = {}
+        self.__writer = BatchWriter(
+            "Заявки на звонок",
+            self.__insert,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+        )
+
+    async def start(self):
+        await self.__writer.start()
+
+    async def stop(self):
+        await self.__writer.stop()
+
+    def record(self, user, chat_id: int | None, message_id: int | None) -> bool:
+        """
+        Сохраняет заявку пользователя.
+        Возвращает False, если пользователь уже оставил заявку недавно
+        """
+        now = time.monotonic()
+        if self.__recent.get(user.id, 0) > now:
+            return False
+
+        if len(self.__recent) >= 10000:
+            self.__recent = {
+                user_id: expires_at
+                for user_id, expires_at in self.__recent.items()
+                if expires_at > now
+            }
+        self.__recent[user.id] = now + self.__dedupe_window
+
+        self.__writer.add(
+            (
+                user.id,
+                user.username,
+                user.full_name,
+                chat_id,
+                message_id,
+                datetime.now(timezone.utc),
+            )
+        )
+        return True
+
+    async def __insert(self, rows):
+        def operation(cursor):
+            execute_values(
+                cursor,
+                "INSERT INTO call_requests "
+                "(user_id, username, full_name, chat_id, message_id, created_at) "
+                "VALUES %s",
+                rows,
+            )
+
+        await self.__db.run(operation)
@@ -1,6 +1,12 @@
 # db.py
 import os
+import time
+import asyncio
+import threading
 import psycopg2
+import psycopg2.pool
+from psycopg2 import sql
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -90,3 +96,234 @@ class POSTGRES:
         except psycopg2.Error as err:
             print(f"❌ Ошибка при проверке таблицы: {err}")
             return False
+
+
+class POSTGRES_POOL:
+    """
+    Асинхронный доступ к PostgreSQL через пул соединений.
+    Запросы выполняются в отдельных потоках, не блокируя event loop,
+    каждая операция выполняется в своей транзакции на своем соединении.
+    """
+
+    def __init__(self, minconn=1, maxconn=10, check_interval=30):
+        self._minconn = minconn
+        self._maxconn = maxconn
+        self._check_interval = check_interval
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._last_used = {}
+        # Потоков не больше, чем соединений: пул никогда не исчерпывается
+        self._executor = ThreadPoolExecutor(
+            max_workers=maxconn, thread_name_prefix="postgres"
+        )
+
+    def _get_pool(self):
+        """Создание пула соединений (или повторная попытка после ошибки)"""
+        with self._pool_lock:
+            if self._pool is None or self._pool.closed:
+                self._pool = psycopg2.pool.ThreadedConnectionPool(
+                    self._minconn,
+                    self._maxconn,
+                    dbname=os.getenv("POSTGRES_DB_NAME"),
+                    user=os.getenv("POSTGRES_DB_USER"),
+                    password=os.getenv("POSTGRES_DB_PASSWORD"),
+                    host=os.getenv("POSTGRES_DB_HOST"),
+                    port=os.getenv("POSTGRES_DB_PORT"),
+                    connect_timeout=10,
+                    keepalives=1,
+                    keepalives_idle=30,
+                    keepalives_interval=10,
+                    keepalives_count=3,
+                )
+                print("✅ Пул соединений с PostgreSQL создан")
+            return self._pool
+
+    def _is_alive(self, connection):
+        """Проверка соединения, простаивавшего дольше check_interval"""
+        if connection.closed:
+            return False
+        last_used = self._last_used.get(id(connection), 0)
+        if time.monotonic() - last_used < self._check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _checkout(self):
+        """Получение проверенного соединения из пула"""
+        pool = self._get_pool()
+        for _ in range(self._maxconn + 1):
+            connection = pool.getconn()
+            if self._is_alive(connection):
+                return pool, connection
+            print("⚠️ Соединение с БД потеряно, переподключаемся...")
+            self._last_used.pop(id(connection), None)
+            pool.putconn(connection, close=True)
+        raise psycopg2.OperationalError("Нет рабочих соединений с базой данных")
+
+    def _run_sync(self, operation):
+        pool, connection = self._checkout()
+        broken = False
+        try:
+            with connection.cursor() as cursor:
+                result = operation(cursor)
+            connection.commit()
+            return result
+        except Exception:
+            broken = bool(connection.closed)
+            if not broken:
+                connection.rollback()
+            raise
+        finally:
+            if broken:
+                self._last_used.pop(id(connection), None)
+            else:
+                self._last_used[id(connection)] = time.monotonic()
+            pool.putconn(connection, close=broken)
+
+    async def run(self, operation):
+        """
+        Выполняет operation(cursor) в отдельной транзакции
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run_sync, operation)
+
+    async def execute(self, query, params=None):
+        """Выполнение запроса, возвращает количество затронутых строк"""
+
+        def operation(cursor):
+            cursor.execute(query, params)
+            return cursor.rowcount
+
+        return await self.run(operation)
+
+    async def fetchall(self, query, params=None):
+        """Выполнение запроса, возвращает все строки"""
+
+        def operation(cursor):
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+        return await self.run(operation)
+
+    async def fetchone(self, query, params=None):
+        """Выполнение запроса, возвращает первую строку"""
+
+        def operation(cursor):
+            cursor.execute(query, params)
+            return cursor.fetchone()
+
+        return await self.run(operation)
+
+    def close(self):
+        """Закрытие всех соединений пула"""
+        self._executor.shutdown(wait=True)
+        if self._pool and not self._pool.closed:
+            self._pool.closeall()
+            print("🔒 Пул соединений с базой данных закрыт")
+
+
+class POSTGRES_LISTENER:
+    """
+    Прием уведомлений PostgreSQL (LISTEN/NOTIFY) на отдельном соединении.
+    Соединение работает в режиме autocommit и читается из event loop, когда
+    в сокете появляются данные. После обрыва соединение восстанавливается,
+    а on_connect вызывается при каждом подключении, чтобы перечитать данные,
+    уведомления об изменении которых могли быть пропущены.
+    """
+
+    def __init__(self, channels, on_notify, on_connect=None, retry_interval=5):
+        self._channels = channels
+        self._on_notify = on_notify
+        self._on_connect = on_connect
+        self._retry_interval = retry_interval
+        self._connection = None
+        self._lost = None
+        self._ready = None
+        self._task = None
+
+    def _connect(self):
+        """Подключение и подписка на каналы"""
+        connection = psycopg2.connect(
+            dbname=os.getenv("POSTGRES_DB_NAME"),
+            user=os.getenv("POSTGRES_DB_USER"),
+            password=os.getenv("POSTGRES_DB_PASSWORD"),
+            host=os.getenv("POSTGRES_DB_HOST"),
+            port=os.getenv("POSTGRES_DB_PORT"),
+            connect_timeout=10,
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=3,
+        )
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            for channel in self._channels:
+                cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+        return connection
+
+    def _on_readable(self):
+        try:
+            self._connection.poll()
+        except psycopg2.Error as err:
+            print(f"⚠️ Соединение для уведомлений PostgreSQL потеряно: {err}")
+            self._lost.set()
+            return
+
+        while self._connection.notifies:
+            notify = self._connection.notifies.pop(0)
+            try:
+                self._on_notify(notify.channel, notify.payload)
+            except Exception as e:
+                print(f"❌ Ошибка при обработке уведомления {notify.channel}: {e}")
+
+    async def start(self):
+        """
+        Запускает прием уведомлений, дожидаясь первой попытки подключения
+        """
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+
+    async def stop(self):
+        """Останавливает прием уведомлений"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                self._connection = await asyncio.to_thread(self._connect)
+            except psycopg2.Error as err:
+                print(f"❌ Ошибка подключения для уведомлений PostgreSQL: {err}")
+                self._ready.set()
+                await asyncio.sleep(self._retry_interval)
+                continue
+
+            fileno = self._connection.fileno()
+            self._lost = asyncio.Event()
+            loop.add_reader(fileno, self._on_readable)
+            try:
+                if self._on_connect:
+                    try:
+                        await self._on_connect()
+                    except Exception as e:
+                        print(f"❌ Ошибка при обновлении данных после подключения: {e}")
+                self._ready.set()
+                await self._lost.wait()
+            finally:
+                loop.remove_reader(fileno)
+                self._connection.close()
+                self._connection = None
+
+            await asyncio.sleep(self._retry_interval)
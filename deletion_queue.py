@@ -0,0 +1,134 @@
+import time
+import heapq
+import asyncio
+from datetime import datetime, timezone
+from psycopg2.extras import execute_values
+
+
+class DeletionQueue:
+    """
+    Очередь отложенного удаления сообщений (уведомлений модерации).
+    Обработчики ставят сообщение в очередь и сразу возвращаются, а одна
+    фоновая задача удаляет сообщения в порядке наступления срока.
+    Очередь хранится в таблице scheduled_deletions, поэтому удаления,
+    не выполненные до перезапуска, выполняются после него.
+    """
+
+    def __init__(self, db):
+        self.__db = db
+        self.__bot = None
+        self.__heap: list[tuple[float, int, int]] = []
+        self.__unsaved: list[tuple[float, int, int]] = []
+        self.__wakeup = asyncio.Event()
+        self.__task: asyncio.Task | None = None
+
+    def schedule(self, chat_id: int, message_id: int, delay: float):
+        """
+        Ставит сообщение в очередь на удаление через delay секунд
+        """
+        item = (time.time() + delay, chat_id, message_id)
+        heapq.heappush(self.__heap, item)
+        self.__unsaved.append(item)
+        self.__wakeup.set()
+
+    async def start(self, bot):
+        """
+        Загружает сохраненную очередь и запускает фоновую задачу
+        """
+        self.__bot = bot
+        await self.__load()
+        self.__task = asyncio.create_task(self.__run())
+        print(f"✅ Очередь удаления запущена, ожидает удаления: {len(self.__heap)}")
+
+    async def stop(self):
+        """
+        Останавливает фоновую задачу и сохраняет еще не записанные удаления
+        """
+        if self.__task:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+        await self.__save()
+
+    async def __run(self):
+        while True:
+            self.__wakeup.clear()
+            await self.__save()
+
+            if not self.__heap:
+                await self.__wakeup.wait()
+                continue
+
+            delay = self.__heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self.__wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due = []
+            now = time.time()
+            while self.__heap and self.__heap[0][0] <= now:
+                due.append(heapq.heappop(self.__heap))
+
+            for _, chat_id, message_id in due:
+                try:
+                    await self.__bot.delete_message(chat_id, message_id)
+                except Exception as e:
+                    print(f"❌ Ошибка при удалении сообщения {message_id}: {e}")
+
+            await self.__forget(due)
+
+    async def __load(self):
+        try:
+            rows = await self.__db.fetchall(
+                "SELECT delete_at, chat_id, message_id FROM scheduled_deletions"
+            )
+            for delete_at, chat_id, message_id in rows:
+                self.__heap.append((delete_at.timestamp(), chat_id, message_id))
+            heapq.heapify(self.__heap)
+        except Exception as e:
+            print(f"❌ Ошибка при загрузке очереди удаления: {e}")
+
+    async def __save(self):
+        if not self.__unsaved:
+            return
+
+        items, self.__unsaved = self.__unsaved, []
+        rows = [
+            (datetime.fromtimestamp(delete_at, timezone.utc), chat_id, message_id)
+            for delete_at, chat_id, message_id in items
+        ]
+        try:
+            await self.__db.run(
+                lambda cursor: execute_values(
+                    cursor,
+                    "INSERT INTO scheduled_deletions (delete_at, chat_id, message_id) "
+                    "VALUES %s ON CONFLICT (chat_id, message_id) DO NOTHING",
+                    rows,
+                )
+            )
+        except Exception as e:
+            self.__unsaved = items + self.__unsaved
+            print(f"❌ Ошибка при сохранении очереди удаления: {e}")
+
+    async def __forget(self, items: list[tuple[float, int, int]]):
+        done = set(items)
+        self.__unsaved = [item for item in self.__unsaved if item not in done]
+
+        try:
+            await self.__db.execute(
+                "DELETE FROM scheduled_deletions "
+                "WHERE (chat_id, message_id) IN "
+                "(SELECT * FROM unnest(%s::bigint[], %s::bigint[]))",
+                (
+                    [chat_id for _, chat_id, _ in items],
+                    [message_id for _, _, message_id in items],
+                ),
+            )
+        except Exception as e:
+            print(f"❌ Ошибка при очистке очереди удаления: {e}")
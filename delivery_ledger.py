@@ -0,0 +1,99 @@
+from datetime import date
+
+
+class DeliveryLedger:
+    """
+    Журнал доставки рассылок.
+    Каждая рассылка (кампания за день) записывается в broadcast_runs,
+    а каждая успешная отправка в группу — в broadcast_deliveries.
+    Прерванная рассылка продолжается только по группам без отметки о доставке.
+    Отметка о доставке записывается сразу после отправки, до отправки
+    следующего сообщения тем же обработчиком рассылки. Повторно сообщение
+    после сбоя может получить только группа, отправка в которую завершилась,
+    а отметка еще не записана: не больше одной группы на каждый обработчик
+    (Broadcaster.concurrency), а также группы, отметку о доставке которых
+    не удалось записать из-за ошибки базы данных.
+    """
+
+    def __init__(self, db):
+        self.__db = db
+
+    async def open_run(self, campaign: str, run_date: date, message: str):
+        """
+        Создает рассылку или возвращает уже начатую.
+        Возвращает текст рассылки, признак ее завершения
+        и признак того, что рассылка была начата раньше
+        """
+
+        def operation(cursor):
+            cursor.execute(
+                "INSERT INTO broadcast_runs (campaign, run_date, message) "
+                "VALUES (%s, %s, %s) ON CONFLICT (campaign, run_date) DO NOTHING "
+                "RETURNING message",
+                (campaign, run_date, message),
+            )
+            if cursor.fetchone():
+                return message, False, False
+            cursor.execute(
+                "SELECT message, finished_at IS NOT NULL FROM broadcast_runs "
+                "WHERE campaign = %s AND run_date = %s",
+                (campaign, run_date),
+            )
+            message_text, finished = cursor.fetchone()
+            return message_text, finished, True
+
+        return await self.__db.run(operation)
+
+    async def finish_run(self, campaign: str, run_date: date):
+        """
+        Отмечает рассылку завершенной
+        """
+        await self.__db.execute(
+            "UPDATE broadcast_runs SET finished_at = CURRENT_TIMESTAMP "
+            "WHERE campaign = %s AND run_date = %s",
+            (campaign, run_date),
+        )
+
+    async def unfinished_runs(self, run_date: date) -> list[tuple[str, str]]:
+        """
+        Возвращает незавершенные рассылки за день: (кампания, текст)
+        """
+        return await self.__db.fetchall(
+            "SELECT campaign, message FROM broadcast_runs "
+            "WHERE run_date = %s AND finished_at IS NULL",
+            (run_date,),
+        )
+
+    async def delivered_groups(self, campaign: str, run_date: date) -> set[int]:
+        """
+        Возвращает группы, в которые рассылка уже доставлена
+        """
+        rows = await self.__db.fetchall(
+            "SELECT chat_id FROM broadcast_deliveries "
+            "WHERE campaign = %s AND run_date = %s",
+            (campaign, run_date),
+        )
+        return {chat_id for chat_id, in rows}
+
+    async def record(self, campaign: str, run_date: date, chat_id: int):
+        """
+        Записывает отметку о доставке в группу
+        """
+
+        def operation(cursor):
+            cursor.execute(
+                "INSERT INTO broadcast_deliveries (campaign, run_date, chat_id) "
+                "VALUES (%s, %s, %s) ON CONFLICT DO NOTHING",
+                (campaign, run_date, chat_id),
+            )
+            cursor.execute(
+                "UPDATE telegram_groups SET last_reminder_date = CURRENT_TIMESTAMP "
+                "WHERE chat_id = %s",
+                (chat_id,),
+            )
+
+        try:
+            await self.__db.run(operation)
+        except Exception as e:
+            # Сообщение уже отправлено: ошибка журнала не делает отправку неудачной
+            print(f"❌ Ошибка при записи журнала доставки: {e}")
@@ -0,0 +1,193 @@
+import codecs
+import asyncio
+import httpx
+from typing import Awaitable, Callable
+from verdict_cache import VerdictCache
+
+
+# Документы, содержимое которых проверяется как текст
+TEXT_MIME_TYPES = {
+    "application/json",
+    "application/xml",
+    "application/rtf",
+    "application/x-subrip",
+}
+# fmt: off
+TEXT_EXTENSIONS = (
+    ".txt", ".text", ".md", ".csv", ".tsv", ".json", ".xml",
+    ".htm", ".html", ".rtf", ".srt", ".log", ".ini",
+)
+# fmt: on
+
+# Бот не может скачать через Bot API файлы больше 20 МБ
+MAX_BOT_API_DOWNLOAD = 20 * 1024 * 1024
+
+
+class DocumentInspector:
+    """
+    Проверка содержимого текстовых документов на ссылки.
+    Документ скачивается потоком в память, но не более max_bytes байт
+    (проверяется только начало файла), текст декодируется по мере получения
+    и проверяется частями по chunk_size символов с перекрытием overlap,
+    чтобы ссылка на границе частей не была пропущена.
+    Результат запоминается по file_unique_id: тот же файл в других группах
+    повторно не скачивается. Если проверка какой-либо части не уложилась
+    в бюджет времени, а ссылок в остальных нет, документ считается чистым,
+    как и не скачанный вовремя, но результат не запоминается.
+    """
+
+    def __init__(
+        self,
+        scan: Callable[[str], Awaitable[bool | None]],
+        max_bytes: int = 1024 * 1024,
+        chunk_size: int = 4096,
+        overlap: int = 256,
+        timeout: float = 5.0,
+        cache_ttl: float = 86400,
+    ):
+        self.__scan = scan
+        self.__max_bytes = max_bytes
+        self.__chunk_size = chunk_size
+        self.__overlap = overlap
+        self.__timeout = timeout
+        self.__cache = VerdictCache(max_entries=10000, ttl=cache_ttl)
+        self.__in_flight: dict[str, asyncio.Task] = {}
+        self.__client: httpx.AsyncClient | None = None
+        self.downloads = 0
+        self.downloaded_bytes = 0
+        self.errors = 0
+        self.undecided = 0
+
+    async def start(self):
+        self.__client = httpx.AsyncClient(timeout=self.__timeout)
+
+    async def stop(self):
+        if self.__client:
+            await self.__client.aclose()
+            self.__client = None
+
+    @staticmethod
+    def is_text_document(document) -> bool:
+        mime_type = document.mime_type or ""
+        file_name = (document.file_name or "").lower()
+        return (
+            mime_type.startswith("text/")
+            or mime_type in TEXT_MIME_TYPES
+            or file_name.endswith(TEXT_EXTENSIONS)
+        )
+
+    async def contains_links(self, bot, document) -> bool:
+        """
+        Проверяет содержимое документа. Документы, которые не удалось
+        скачать за timeout секунд, считаются чистыми (и не запоминаются)
+        """
+        if not self.is_text_document(document):
+            return False
+        if document.file_size and document.file_size > MAX_BOT_API_DOWNLOAD:
+            return False
+
+        key = document.file_unique_id.encode()
+        verdict = self.__cache.get(key)
+        if verdict is not None:
+            return verdict
+
+        # Один и тот же файл, отправленный одновременно в несколько групп,
+        # скачивается один раз
+        task = self.__in_flight.get(document.file_unique_id)
+        if task is None:
+            task = asyncio.create_task(
+                asyncio.wait_for(self.__inspect(bot, document), self.__timeout)
+            )
+            self.__in_flight[document.file_unique_id] = task
+            task.add_done_callback(
+                lambda _: self.__in_flight.pop(document.file_unique_id, None)
+            )
+
+        try:
+            verdict = await asyncio.shield(task)
+        except Exception as e:
+            self.errors += 1
+            print(f"❌ Ошибка при проверке документа {document.file_name}: {e!r}")
+            return False
+
+        if verdict is None:
+            self.undecided += 1
+            return False
+        self.__cache.put(key, verdict)
+        return verdict
+
+    async def __inspect(self, bot, document) -> bool | None:
+        file = await bot.get_file(document.file_id)
+        self.downloads += 1
+
+        decoder = None
+        buffer = ""
+        # Есть ли в буфере текст, который еще не проверялся
+        fresh = False
+        # Была ли часть, проверка которой не завершилась вовремя
+        undecided = False
+        received = 0
+        async with self.__client.stream("GET", file.file_path) as response:
+            response.raise_for_status()
+            async for data in response.aiter_bytes():
+                data = data[: self.__max_bytes - received]
+                received += len(data)
+                self.downloaded_bytes += len(data)
+                if decoder is None:
+                    decoder = self.incremental_decoder(data)
+                buffer += decoder.decode(data)
+                fresh = True
+
+                start = 0
+                while len(buffer) - start >= self.__chunk_size:
+                    chunk = buffer[start : start + self.__chunk_size]
+                    verdict = await self.__scan(chunk)
+                    if verdict:
+                        return True
+                    undecided = undecided or verdict is None
+                    start += self.__chunk_size - self.__overlap
+                if start:
+                    buffer = buffer[start:]
+                    fresh = len(buffer) > self.__overlap
+
+                if received >= self.__max_bytes:
+                    break
+
+        if decoder is not None:
+            tail = decoder.decode(b"", final=True)
+            buffer += tail
+            fresh = fresh or bool(tail)
+        verdict = fresh and await self.__scan(buffer)
+        if verdict:
+            return True
+        return None if undecided or verdict is None else False
+
+    @staticmethod
+    def incremental_decoder(head: bytes):
+        """
+        Декодер по началу файла: BOM, иначе UTF-8, если начало файла
+        является корректным UTF-8, иначе cp1251
+        """
+        if head.startswith(codecs.BOM_UTF8):
+            encoding = "utf-8-sig"
+        elif head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            encoding = "utf-16"
+        else:
+            try:
+                codecs.getincrementaldecoder("utf-8")().decode(head)
+                encoding = "utf-8"
+            except UnicodeDecodeError:
+                encoding = "cp1251"
+        return codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    def stats(self) -> dict:
+        """
+        Скачивания документов и попадания в кэш результатов
+        """
+        return {
+            "downloads": self.downloads,
+            "downloaded_bytes": self.downloaded_bytes,
+            "errors": self.errors,
+            "undecided": self.undecided,
+            "cache": self.__cache.stats(),
+        }
@@ -0,0 +1,211 @@
+import re
+import json
+from db import POSTGRES_LISTENER
+
+
+# Канал уведомлений об изменении domain_rules (см. триггер в main.py)
+DOMAIN_RULES_CHANNEL = "domain_rules"
+
+# Правила для всех групп хранятся с chat_id = 0
+GLOBAL_CHAT_ID = 0
+
+ALLOW = "allow"
+DENY = "deny"
+
+# Хост ссылки: без протокола, пользователя, порта и пути
+HOST_PATTERN = re.compile(
+    r"^(?:[a-z][a-z0-9+.\-]*://)?(?:[^/@\s]*@)?([^/:?#\s\"'<>]+)", re.IGNORECASE
+)
+
+
+def extract_host(link: str | None) -> str | None:
+    """
+    Хост ссылки в нижнем регистре, None для упоминаний (@username)
+    """
+    if not link:
+        return None
+    # Знаки препинания вокруг слова с доменом: "(shop.ru)", "«shop.ru»,"
+    link = link.strip().strip("\"'«»()[]<>,;!")
+    if link.startswith("@"):
+        return None
+    match = HOST_PATTERN.match(link)
+    if not match:
+        return None
+    host = match.group(1).strip(".").lower()
+    return host or None
+
+
+class DomainTrie:
+    """
+    Правила по доменам в виде дерева меток, начиная с доменной зоны
+    (ru → shop → www). Правило для домена действует и на его поддомены,
+    при нескольких подходящих правилах выбирается самое точное.
+    Поиск занимает столько шагов, сколько меток в домене.
+    """
+
+    __ACTION = ""
+
+    def __init__(self, rules: dict[str, str] | None = None):
+        self.__root: dict = {}
+        for domain, action in (rules or {}).items():
+            self.add(domain, action)
+
+    def __bool__(self) -> bool:
+        return bool(self.__root)
+
+    def add(self, domain: str, action: str):
+        node = self.__root
+        for label in reversed(domain.lower().split(".")):
+            node = node.setdefault(label, {})
+        node[self.__ACTION] = action
+
+    def lookup(self, host: str) -> str | None:
+        """
+        Действие самого точного правила для хоста или None
+        """
+        action = None
+        node = self.__root
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            action = node.get(self.__ACTION, action)
+        return action
+
+
+class DomainRules:
+    """
+    Списки разрешенных и запрещенных доменов: общие (chat_id = 0)
+    и отдельные для групп. Правила хранятся в domain_rules, в памяти
+    каждый список собран в DomainTrie. Изменения применяются без
+    перезапуска: другие экземпляры бота получают их через LISTEN/NOTIFY.
+    Правило группы важнее общего правила, общее — встроенного
+    (builtin_allow, например домен сайта магазина).
+    """
+
+    def __init__(self, db, builtin_allow: list[str] | None = None):
+        self.__db = db
+        self.__builtin = DomainTrie(
+            {domain: ALLOW for domain in builtin_allow or [] if domain}
+        )
+        self.__rules: dict[int, dict[str, str]] = {}
+        self.__tries: dict[int, DomainTrie] = {}
+        # Группы (и 0 для общих правил), где есть разрешенные домены
+        self.__allowing: set[int] = set()
+        self.__listener = POSTGRES_LISTENER(
+            [DOMAIN_RULES_CHANNEL], self.__on_notify, on_connect=self.load
+        )
+
+    async def start(self):
+        """
+        Подписывается на изменения и загружает правила
+        """
+        await self.__listener.start()
+
+    async def stop(self):
+        await self.__listener.stop()
+
+    async def load(self):
+        """
+        Загружает правила из базы данных
+        """
+        rows = await self.__db.fetchall(
+            "SELECT chat_id, domain, action FROM domain_rules"
+        )
+        rules: dict[int, dict[str, str]] = {}
+        for chat_id, domain, action in rows:
+            rules.setdefault(chat_id, {})[domain] = action
+        self.__rules = rules
+        self.__tries = {
+            chat_id: DomainTrie(chat_rules) for chat_id, chat_rules in rules.items()
+        }
+        self.__allowing = {
+            chat_id
+            for chat_id, chat_rules in rules.items()
+            if ALLOW in chat_rules.values()
+        }
+        print(f"✅ Загружено правил доменов: {len(rows)}")
+
+    def rules(self, chat_id: int) -> dict[str, str]:
+        """Правила группы (или общие для chat_id = 0): домен → действие"""
+        return dict(self.__rules.get(chat_id, {}))
+
+    def action(self, chat_id: int, link: str | None) -> str | None:
+        """
+        Действие для ссылки в группе: allow, deny или None (нет правила)
+        """
+        host = extract_host(link)
+        if host is None:
+            return None
+        for trie in (
+            self.__tries.get(chat_id),
+            self.__tries.get(GLOBAL_CHAT_ID),
+            self.__builtin,
+        ):
+            if trie:
+                action = trie.lookup(host)
+                if action:
+                    return action
+        return None
+
+    def has_allowed(self, chat_id: int) -> bool:
+        """
+        Есть ли в группе разрешенные домены (иначе любая ссылка — нарушение)
+        """
+        return (
+            bool(self.__builtin)
+            or chat_id in self.__allowing
+            or GLOBAL_CHAT_ID in self.__allowing
+        )
+
+    def allows_all(self, chat_id: int, links: list[str] | None) -> bool:
+        """
+        Все ссылки ведут на разрешенные домены
+        """
+        return bool(links) and all(
+            self.action(chat_id, link) == ALLOW for link in links
+        )
+
+    async def set(self, chat_id: int, domain: str, action: str, added_by: int):
+        """
+        Добавляет или изменяет правило
+        """
+        await self.__db.execute(
+            "INSERT INTO domain_rules (chat_id, domain, action, added_by) "
+            "VALUES (%s, %s, %s, %s) ON CONFLICT (chat_id, domain) "
+            "DO UPDATE SET action = EXCLUDED.action, added_by = EXCLUDED.added_by",
+            (chat_id, domain, action, added_by),
+        )
+        self.__apply(chat_id, domain, action)
+
+    async def remove(self, chat_id: int, domain: str) -> bool:
+        """
+        Удаляет правило, возвращает False, если его не было
+        """
+        removed = await self.__db.execute(
+            "DELETE FROM domain_rules WHERE chat_id = %s AND domain = %s",
+            (chat_id, domain),
+        )
+        self.__apply(chat_id, domain, None)
+        return bool(removed)
+
+    def __apply(self, chat_id: int, domain: str, action: str | None):
+        chat_rules = self.__rules.setdefault(chat_id, {})
+        if action is None:
+            chat_rules.pop(domain, None)
+        else:
+            chat_rules[domain] = action
+        if chat_rules:
+            self.__tries[chat_id] = DomainTrie(chat_rules)
+        else:
+            self.__rules.pop(chat_id, None)
+            self.__tries.pop(chat_id, None)
+        if ALLOW in chat_rules.values():
+            self.__allowing.add(chat_id)
+        else:
+            self.__allowing.discard(chat_id)
+
+    def __on_notify(self, channel: str, payload: str):
+        event = json.loads(payload)
+        action = None if event["op"] == "DELETE" else event["action"]
+        self.__apply(event["chat_id"], event["domain"], action)
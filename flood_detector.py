@@ -0,0 +1,135 @@
+import time
+import hashlib
+from collections import OrderedDict, deque
+
+
+class _UserActivity:
+    """
+    Скользящие окна одного пользователя
+    """
+
+    __slots__ = ("last_seen", "chat_messages", "fingerprints")
+
+    def __init__(self):
+        self.last_seen = 0.0
+        # chat_id -> время последних сообщений в чате
+        self.chat_messages: dict[int, deque] = {}
+        # отпечаток содержимого -> время последних повторов во всех группах
+        self.fingerprints: OrderedDict[bytes, deque] = OrderedDict()
+
+
+class FloodDetector:
+    """
+    Обнаружение флуда и повторяющихся сообщений.
+    Для каждого пользователя хранятся скользящие окна: время последних
+    max_messages сообщений в каждом чате и время последних max_duplicates
+    повторов одного и того же содержимого во всех группах. Проверка одного
+    сообщения выполняется за O(1), неактивные пользователи вытесняются.
+    """
+
+    def __init__(
+        self,
+        window: float = 60,
+        max_messages: int = 10,
+        max_duplicates: int = 3,
+        max_users: int = 50000,
+        idle_ttl: float = 600,
+        max_fingerprints: int = 16,
+    ):
+        self.__window = window
+        self.__max_messages = max_messages
+        self.__max_duplicates = max_duplicates
+        self.__max_users = max_users
+        self.__idle_ttl = max(idle_ttl, window)
+        self.__max_fingerprints = max_fingerprints
+        self.__users: OrderedDict[int, _UserActivity] = OrderedDict()
+
+    def check(
+        self, chat_id: int, user_id: int, fingerprint: bytes | None
+    ) -> str | None:
+        """
+        Учитывает сообщение и возвращает причину нарушения:
+        "flood", "duplicate" или None
+        """
+        now = time.monotonic()
+        self.__evict(now)
+
+        activity = self.__users.get(user_id)
+        if activity is None:
+            activity = self.__users[user_id] = _UserActivity()
+        else:
+            self.__users.move_to_end(user_id)
+        activity.last_seen = now
+
+        violation = None
+
+        if fingerprint is not None:
+            repeats = activity.fingerprints.get(fingerprint)
+            if repeats is None:
+                repeats = activity.fingerprints[fingerprint] = deque(
+                    maxlen=self.__max_duplicates
+                )
+                if len(activity.fingerprints) > self.__max_fingerprints:
+                    activity.fingerprints.popitem(last=False)
+            else:
+                activity.fingerprints.move_to_end(fingerprint)
+            repeats.append(now)
+            if (
+                len(repeats) == self.__max_duplicates
+                and now - repeats[0] <= self.__window
+            ):
+                violation = "duplicate"
+
+        messages = activity.chat_messages.get(chat_id)
+        if messages is None:
+            messages = activity.chat_messages[chat_id] = deque(
+                maxlen=self.__max_messages
+            )
+        messages.append(now)
+        if (
+            len(messages) == self.__max_messages
+            and now - messages[0] <= self.__window
+        ):
+            violation = violation or "flood"
+
+        return violation
+
+    def __evict(self, now: float):
+        # Самые давно активные пользователи находятся в начале словаря
+        while self.__users:
+            user_id, activity = next(iter(self.__users.items()))
+            if (
+                len(self.__users) <= self.__max_users
+                and now - activity.last_seen <= self.__idle_ttl
+            ):
+                break
+            del self.__users[user_id]
+
+
+def message_fingerprint(message) -> bytes | None:
+    """
+    Отпечаток содержимого сообщения: текст без учета регистра и пробелов
+    или file_unique_id стикера/медиа
+    """
+    text = message.text or message.caption
+    media = (
+        message.sticker
+        or (message.photo[-1] if message.photo else None)
+        or message.animation
+        or message.video
+        or message.document
+        or message.voice
+        or message.video_note
+        or message.audio
+    )
+    if not text and not media:
+        return None
+
+    digest = hashlib.blake2b(digest_size=16)
+    if media:
+        digest.update(media.file_unique_id.encode())
+    digest.update(b"\x00")
+    if text:
+        normalized = " ".join(text.casefold().split())
+        digest.update(normalized.encode("utf-8", "surrogatepass"))
+    return digest.digest()
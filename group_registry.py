@@ -0,0 +1,128 @@
+import json
+from db import POSTGRES_LISTENER
+
+
+# Канал уведомлений об изменении telegram_groups (см. триггер в main.py)
+GROUPS_CHANNEL = "telegram_groups"
+
+
+class GroupRegistry:
+    """
+    Список групп бота в памяти.
+    Загружается из telegram_groups при запуске и после переподключения,
+    изменения записываются в базу и рассылаются другим экземплярам бота
+    через LISTEN/NOTIFY, поэтому рассылки и модерация читают группы
+    без обращения к базе данных.
+    """
+
+    def __init__(self, db):
+        self.__db = db
+        self.__groups: dict[int, str | None] = {}
+        self.__listener = POSTGRES_LISTENER(
+            [GROUPS_CHANNEL], self.__on_notify, on_connect=self.load
+        )
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self.__groups
+
+    def __len__(self) -> int:
+        return len(self.__groups)
+
+    def title(self, chat_id: int) -> str | None:
+        """Название группы"""
+        return self.__groups.get(chat_id)
+
+    def items(self) -> list[tuple[int, str | None]]:
+        """Снимок списка групп: (chat_id, название)"""
+        return list(self.__groups.items())
+
+    async def start(self):
+        """
+        Подписывается на изменения и загружает список групп
+        """
+        await self.__listener.start()
+
+    async def stop(self):
+        await self.__listener.stop()
+
+    async def load(self):
+        """
+        Загружает список групп из базы данных
+        """
+        rows = await self.__db.fetchall("SELECT chat_id, title FROM telegram_groups")
+        self.__groups = dict(rows)
+        print(f"✅ Загружено групп: {len(self.__groups)}")
+
+    async def upsert(self, chat_id: int, title: str | None):
+        """
+        Добавляет группу или обновляет ее название.
+        Повторное добавление уже известной группы не обращается к базе
+        """
+        if chat_id in self.__groups and self.__groups[chat_id] == title:
+            return
+
+        known = chat_id in self.__groups
+        previous = self.__groups.get(chat_id)
+        self.__groups[chat_id] = title
+        try:
+            await self.__db.execute(
+                "INSERT INTO telegram_groups (chat_id, title) VALUES (%s, %s) "
+                "ON CONFLICT (chat_id) DO UPDATE SET title = EXCLUDED.title",
+                (chat_id, title),
+            )
+        except Exception:
+            # Запись повторится при следующем обращении
+            if known:
+                self.__groups[chat_id] = previous
+            else:
+                self.__groups.pop(chat_id, None)
+            raise
+
+    async def remove(self, chat_ids: list[int]):
+        """
+        Удаляет группы (например, если бот исключен)
+        """
+        if not chat_ids:
+            return
+
+        for chat_id in chat_ids:
+            self.__groups.pop(chat_id, None)
+        await self.__db.execute(
+            "DELETE FROM telegram_groups WHERE chat_id = ANY(%s)", (list(chat_ids),)
+        )
+
+    async def migrate(self, chat_ids: dict[int, int]):
+        """
+        Переносит группы на новые chat_id после преобразования в супергруппу
+        """
+        if not chat_ids:
+            return
+
+        old_ids, new_ids = list(chat_ids), list(chat_ids.values())
+        for old_id, new_id in chat_ids.items():
+            self.__groups[new_id] = self.__groups.pop(old_id, None)
+
+        def operation(cursor):
+            cursor.execute(
+                """
+                INSERT INTO telegram_groups (chat_id, title, added_date, last_reminder_date)
+                SELECT m.new_id, g.title, g.added_date, g.last_reminder_date
+                FROM telegram_groups g
+                JOIN unnest(%s::bigint[], %s::bigint[]) AS m(old_id, new_id)
+                    ON g.chat_id = m.old_id
+                ON CONFLICT (chat_id) DO NOTHING
+                """,
+                (old_ids, new_ids),
+            )
+            cursor.execute(
+                "DELETE FROM telegram_groups WHERE chat_id = ANY(%s)", (old_ids,)
+            )
+
+        await self.__db.run(operation)
+
+    def __on_notify(self, channel: str, payload: str):
+        event = json.loads(payload)
+        if event["op"] == "DELETE":
+            self.__groups.pop(event["chat_id"], None)
+        else:
+            self.__groups[event["chat_id"]] = event["title"]
@@ -0,0 +1,31 @@
+import os
+from apscheduler.jobstores.base import BaseJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from sqlalchemy.engine import URL
+
+
+class PostgresJobStore(SQLAlchemyJobStore):
+    """
+    Хранилище задач APScheduler в базе данных бота.
+    Таблица apscheduler_jobs создается в main.py вместе с остальной схемой,
+    поэтому при запуске планировщика ее наличие повторно не проверяется.
+    """
+
+    def __init__(self, tablename: str = "apscheduler_jobs"):
+        url = URL.create(
+            "postgresql+psycopg2",
+            username=os.getenv("POSTGRES_DB_USER"),
+            password=os.getenv("POSTGRES_DB_PASSWORD"),
+            host=os.getenv("POSTGRES_DB_HOST"),
+            port=os.getenv("POSTGRES_DB_PORT"),
+            database=os.getenv("POSTGRES_DB_NAME"),
+        )
+        super().__init__(
+            url=url,
+            tablename=tablename,
+            engine_options={"pool_pre_ping": True},
+        )
+
+    def start(self, scheduler, alias):
+        # SQLAlchemyJobStore.start выполняет CREATE TABLE с проверкой схемы
+        BaseJobStore.start(self, scheduler, alias)
@@ -0,0 +1,522 @@
+import re
+import time
+from bisect import bisect_right
+from itertools import chain
+from typing import Optional
+from link_normalizer import normalize
+
+
+# Открывающий тег HTML ссылки <a href="...">текст</a>.
+# Markdown и HTML ссылки ищутся поиском подстрок (has_markdown_link, has_html_link):
+# регулярные выражения вида \[.*?\]\(.*?\) работают за квадратичное время
+HTML_OPEN_TAG_PATTERN = re.compile(r"<a\s", re.IGNORECASE)
+
+# Ссылки не содержат пробелов, поэтому текст проверяется по словам,
+# а длинные слова — окнами SCAN_WINDOW символов с перекрытием SCAN_OVERLAP.
+# Так время проверки растет линейно с длиной текста
+TOKEN_PATTERN = re.compile(r"\S+")
+SCAN_WINDOW = 256
+SCAN_OVERLAP = 64
+# Символы, на которых заканчивается адрес ссылки (см. LINK_PATTERN)
+LINK_END_PATTERN = re.compile(r'[<>"\'\[\]{}|\\^`]')
+
+# Комбинированный паттерн для всех типов ссылок
+LINK_PATTERN = re.compile(
+    "|".join(
+        f"({pattern})"
+        for pattern in [
+            # 1. URL с протоколом (http, https, ftp, ftps)
+            r'(?:https?|ftp|ftps)://[^\s<>"\'\[\]{}|\\^`]+',
+            # 2. www.домены (начинающиеся с www.)
+            r'\bwww\.[^\s<>"\'\[\]{}|\\^`]+',
+            # 3. Домены без протокола (с популярными TLD).
+            # Число меток ограничено: при неограниченном повторении каждая
+            # позиция цепочки "a.a.a..." перебирает все метки до ее конца.
+            # Опережающая проверка отсекает позиции, где TLD (не короче
+            # двух букв) невозможен, без перебора всех вариантов
+            r"\b(?!@)(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.){1,16}"
+            r"(?=[a-zа-яё]{2})"
+            r"(?:com|org|net|edu|gov|mil|int|info|biz|ru|рф|ua|by|kz|"
+            r"uk|de|fr|es|it|pl|cz|sk|hu|ro|bg|gr|tr|ir|il|sa|ae|"
+            r"in|cn|jp|kr|vn|th|id|my|ph|sg|au|nz|ca|mx|br|ar|cl|co|"
+            r"[a-z]{2,})"
+            r"(?::\d{2,5})?"
+            r"(?:/[\w\-\.~!$&\'()*+,;=:@%]*)?"
+            r'(?:\?[^\s<>"\']*)?'
+            r'(?:#[^\s<>"\']*)?',
+            # 4. Telegram-специфичные ссылки
+            r"\b(?:t\.me/|telegram\.me/|tg://|@)[a-zA-Z0-9_][a-zA-Z0-9_\-/]*",
+            # 5. IP-адреса с портами/путями
+            r"\b(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])\."
+            r"(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])\."
+            r"(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])\."
+            r"(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])"
+            r"(?::\d{2,5})?"
+            r"(?:/[\w\-\.~!$&\'()*+,;=:@%]*)?",
+        ]
+    ),
+    re.IGNORECASE,
+)
+
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+
+# Скрытые ссылки с использованием Unicode или обфускации:
+# кириллические домены (кириллица перед доменом на результат не влияет,
+# поэтому ищется только сам домен и проверяется следующий символ)
+CYRILLIC_DOMAIN_PATTERN = re.compile(r"\.(?:рф|com|org|net)", re.IGNORECASE)
+CYRILLIC_LETTERS = frozenset(
+    "абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ"
+)
+# и многоточечные структуры (поиск начинается только с начала слова,
+# а не с каждой границы внутри него: дефисы в начале не влияют на результат)
+DOTTED_WORDS_PATTERN = re.compile(
+    r"(?<![\w\-])-*\b[\w\-]+\.[\w\-]+\.[\w\-]+\b", re.IGNORECASE
+)
+SUSPICIOUS_EXCEPTIONS = ("example", "test", "localhost")
+DOMAIN_ENDING_PATTERN = re.compile(r"\.[a-z]{2,}$", re.IGNORECASE)
+
+# Без этих символов ни один из паттернов выше сработать не может
+TRIGGER_PATTERN = re.compile(r"[.@:\[<]")
+
+# Список исключений (ложные срабатывания)
+DEFAULT_EXCEPTIONS = (
+    "example.com",
+    "example.org",
+    "example.net",
+    "example.edu",
+    "test.com",
+    "test.org",
+    "demo.com",
+    "sample.com",
+    "localhost",
+    "localdomain",
+    "127.0.0.1",
+    "0.0.0.0",
+    "api",
+    "www",
+    "http",
+    "https",
+    "ftp",
+)
+
+
+def token_windows(text: str):
+    """
+    Слова текста, в которых может быть ссылка, длинные слова — окнами:
+    (позиция окна в тексте, конец слова, окно)
+    """
+    step = SCAN_WINDOW - SCAN_OVERLAP
+    for match in TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        if "." not in token and "@" not in token and ":" not in token:
+            continue
+        if len(token) <= SCAN_WINDOW:
+            yield match.start(), match.end(), token
+            continue
+        for start in range(0, len(token) - SCAN_OVERLAP, step):
+            window = token[start : start + SCAN_WINDOW]
+            yield match.start() + start, match.end(), window
+
+
+def in_spans(spans: list[tuple[int, int]], position: int) -> bool:
+    """
+    Попадает ли позиция в один из непересекающихся отрезков,
+    упорядоченных по началу
+    """
+    index = bisect_right(spans, (position, float("inf"))) - 1
+    return index >= 0 and position < spans[index][1]
+
+
+def strip_tags(text: str) -> str:
+    """
+    Удаляет HTML теги (то же, что re.sub(r"<[^>]+>", "", text), но без
+    повторного просмотра текста после каждого незакрытого "<")
+    """
+    parts = []
+    position = 0
+    search_from = 0
+    while True:
+        start = text.find("<", search_from)
+        if start == -1:
+            break
+        end = text.find(">", start + 1)
+        if end == -1:
+            break
+        if end == start + 1:
+            # "<>" тегом не считается
+            search_from = end
+            continue
+        parts.append(text[position:start])
+        position = search_from = end + 1
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def strip_markdown_links(text: str) -> str:
+    r"""
+    Заменяет Markdown ссылки их текстом (то же, что
+    re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text), но позиции "]" и ")"
+    для подряд идущих "[" ищутся один раз, а не заново для каждой)
+    """
+    parts = []
+    position = 0
+    start = text.find("[")
+    close_bracket = close_paren = -1
+    while start != -1:
+        if close_bracket < start + 1:
+            close_bracket = text.find("]", start + 1)
+            close_paren = -1
+            if close_bracket == -1:
+                break
+        # Текст ссылки не пустой, сразу после "]" идет "("
+        if (
+            close_bracket == start + 1
+            or text[close_bracket + 1 : close_bracket + 2] != "("
+        ):
+            start = text.find("[", start + 1)
+            continue
+        if close_paren == -1:
+            close_paren = text.find(")", close_bracket + 2)
+            if close_paren == -1:
+                break
+        if close_paren == close_bracket + 2:
+            start = text.find("[", start + 1)
+            continue
+        parts.append(text[position:start])
+        parts.append(text[start + 1 : close_bracket])
+        position = close_paren + 1
+        start = text.find("[", position)
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def clean_markup(text: str) -> str:
+    """
+    Очистка текста от разметки для поиска обычных ссылок
+    (теги удаляются вместе с <a>, текст ссылки остается)
+    """
+    if "[" in text:
+        text = strip_markdown_links(text)
+    if "<" in text:
+        text = strip_tags(text)
+    return text
+
+
+def markdown_links(text: str):
+    """
+    Адреса Markdown ссылок [текст](URL) в пределах одной строки
+    """
+    for line in text.split("\n"):
+        start = line.find("[")
+        if start == -1:
+            continue
+        middle = line.find("](", start + 1)
+        while middle != -1:
+            close = line.find(")", middle + 2)
+            if close == -1:
+                break
+            yield line[middle + 2 : close]
+            middle = line.find("](", close + 1)
+
+
+def has_markdown_link(text: str) -> bool:
+    """
+    Markdown ссылка [текст](URL) в пределах одной строки
+    """
+    return next(markdown_links(text), None) is not None
+
+
+def html_links(text: str):
+    """
+    Адреса HTML ссылок <a ... href="URL">текст</a>
+    (текст ссылки в пределах одной строки)
+    """
+    if "<" not in text:
+        return
+
+    lower = text.lower()
+    tag_end = -1
+    for match in HTML_OPEN_TAG_PATTERN.finditer(lower):
+        # Теги до одного и того же ">" проверяются один раз
+        if match.start() < tag_end:
+            continue
+        tag_end = lower.find(">", match.start())
+        if tag_end == -1:
+            return
+
+        href = lower.find('href="', match.end() - 1, tag_end)
+        if href == -1:
+            continue
+        quote = lower.find('"', href + 6)
+        close = lower.find(">", quote + 1) if quote != -1 else -1
+        if close == -1:
+            return
+        end = lower.find("</a>", close + 1)
+        if end == -1:
+            return
+        if lower.find("\n", close + 1, end) == -1:
+            yield text[href + 6 : quote]
+
+
+def has_html_link(text: str) -> bool:
+    """
+    HTML ссылка <a ... href="...">текст</a>
+    """
+    return next(html_links(text), None) is not None
+
+
+def cyrillic_domains(clean_text: str):
+    """
+    Совпадения кириллического паттерна: (позиция, слово с доменом),
+    вместо слова None, если совпадение на ссылку не похоже
+    """
+    # Начало слова ищется только до предыдущего совпадения:
+    # между ними нет пробела — значит, слово то же
+    token_start = scanned = 0
+    for suspicious_match in CYRILLIC_DOMAIN_PATTERN.finditer(clean_text):
+        start = suspicious_match.start()
+        end = suspicious_match.end()
+        position = start
+        while position > scanned and not clean_text[position - 1].isspace():
+            position -= 1
+        if position > scanned:
+            token_start = position
+        scanned = start
+        # Кириллический домен похож на ссылку, если он латинский
+        # (.com/.org/.net) и за ним не следует кириллица
+        if suspicious_match.group()[1:].isascii() and (
+            end == len(clean_text) or clean_text[end] not in CYRILLIC_LETTERS
+        ):
+            yield start, clean_text[token_start:end]
+        else:
+            yield start, None
+
+
+def dotted_domains(windows):
+    """
+    Многоточечные слова в окнах (позиция окна, окно): (позиция, слово),
+    вместо слова None, если совпадение на домен не похоже
+    """
+    for position, window in windows:
+        for suspicious_match in DOTTED_WORDS_PATTERN.finditer(window):
+            match_text = suspicious_match.group()
+            # Исключаем очевидные не-ссылки и проверяем, похоже ли это на домен
+            if not any(
+                exc in match_text.lower() for exc in SUSPICIOUS_EXCEPTIONS
+            ) and DOMAIN_ENDING_PATTERN.search(match_text):
+                yield position + suspicious_match.start(), match_text
+            else:
+                yield position + suspicious_match.start(), None
+
+
+def positioned_windows(clean_text: str):
+    """Окна слов с позициями в тексте: (позиция окна, окно)"""
+    for position, _, window in token_windows(clean_text):
+        yield position, window
+
+
+class LinkDetector:
+    """
+    Детектор ссылок в тексте сообщений.
+    Все паттерны компилируются один раз при импорте модуля и работают
+    за линейное время: текст проверяется по словам и окнами ограниченной
+    длины. Если проверка не укладывается в time_budget секунд,
+    результат не определен (None): решение о сообщении принимает
+    вызывающий код, такой результат не кэшируется.
+    """
+
+    __TERMINAL = ""
+
+    def __init__(self, exceptions=DEFAULT_EXCEPTIONS, time_budget: float = 0.05):
+        self.__time_budget = time_budget
+        self.budget_exceeded = 0
+        # Индекс исключений по меткам домена: исключение срабатывает, если
+        # его метки встречаются в совпадении подряд (целиком, в начале,
+        # в конце или в середине между точками)
+        self.__exceptions: dict = {}
+        for exception in exceptions:
+            node = self.__exceptions
+            for label in exception.lower().split("."):
+                node = node.setdefault(label, {})
+            node[self.__TERMINAL] = True
+
+    def is_exception(self, match_lower: str) -> bool:
+        """
+        Проверяет, попадает ли совпадение под список исключений
+        """
+        labels = match_lower.split(".")
+        root = self.__exceptions
+        for start in range(len(labels)):
+            node = root.get(labels[start])
+            position = start + 1
+            while node is not None:
+                if self.__TERMINAL in node:
+                    return True
+                if position == len(labels):
+                    break
+                node = node.get(labels[position])
+                position += 1
+        return False
+
+    def normalize(self, text: str) -> str:
+        """
+        Приводит обфусцированные ссылки к обычному виду (см. link_normalizer)
+        """
+        return normalize(text)
+
+    def contains_links(self, text: Optional[str]) -> bool | None:
+        """
+        Проверяет наличие ссылок в тексте.
+        Определяет все виды ссылок: с протоколом, без протокола, Telegram-ссылки,
+        IP-адреса, Markdown и HTML ссылки, в том числе обфусцированные.
+        None, если проверка не уложилась в time_budget
+        """
+        # Проверка на None или пустую строку
+        if not text or not isinstance(text, str):
+            return False
+
+        return self.scan(self.normalize(text))
+
+    def scan(self, text: str) -> bool | None:
+        """
+        Проверяет наличие ссылок в уже нормализованном тексте,
+        None, если проверка не уложилась в time_budget
+        """
+        if not text:
+            return False
+
+        if not TRIGGER_PATTERN.search(text):
+            return False
+
+        # Проверка на Markdown и HTML ссылки
+        if has_markdown_link(text) or has_html_link(text):
+            return True
+
+        clean_text = clean_markup(text)
+        windows = []
+        for link in self.__links(clean_text, windows, []):
+            if link is None:
+                return self.__over_budget(text)
+            return True
+
+        return self.has_suspicious_domain(clean_text, windows)
+
+    def find_links(self, text: str) -> list[str] | None:
+        """
+        Все ссылки в нормализованном тексте (для проверки по спискам доменов).
+        None, если поиск не уложился в time_budget
+        """
+        if not text or not TRIGGER_PATTERN.search(text):
+            return []
+
+        links = [*markdown_links(text), *html_links(text)]
+        clean_text = clean_markup(text)
+        windows = []
+        spans = []
+        for link in self.__links(clean_text, windows, spans):
+            if link is None:
+                return self.__over_budget(text)
+            links.append(link)
+
+        links.extend(self.suspicious_domains(clean_text, windows, spans))
+        return list(dict.fromkeys(links))
+
+    def __links(self, clean_text: str, windows: list, spans: list):
+        """
+        Ссылки в словах текста (None, если поиск не уложился в time_budget).
+        Просмотренные окна добавляются в windows (для поиска скрытых ссылок),
+        части текста, занятые найденными ссылками, — в spans. Совпадения
+        внутри них (например, путь длинной ссылки, попавший в следующее
+        окно слова) отдельными ссылками не считаются
+        """
+        deadline = time.perf_counter() + self.__time_budget
+        for position, token_end, window in token_windows(clean_text):
+            if time.perf_counter() > deadline:
+                yield None
+                return
+            windows.append((position, window))
+            for match in LINK_PATTERN.finditer(window):
+                start = position + match.start()
+                if spans and start < spans[-1][1]:
+                    continue
+                match_text = match.group(match.lastindex)
+                if not self.is_link(match_text):
+                    continue
+                end = position + match.end()
+                if match.end() == len(window) and end < token_end:
+                    # Ссылка обрезана окном и продолжается до конца адреса
+                    link_end = LINK_END_PATTERN.search(clean_text, end, token_end)
+                    end = link_end.start() if link_end else token_end
+                spans.append((start, end))
+                yield match_text
+
+    def __over_budget(self, text: str) -> None:
+        self.budget_exceeded += 1
+        print(
+            f"⚠️ Проверка сообщения ({len(text)} символов) превысила "
+            f"{self.__time_budget * 1000:.0f} мс, результат не определен"
+        )
+        return None
+
+    def is_link(self, match_text: str) -> bool:
+        """
+        Отсеивает ложные срабатывания среди найденных совпадений
+        """
+        if self.is_exception(match_text.lower().strip()):
+            return False
+
+        # Проверка на email (исключаем)
+        if EMAIL_PATTERN.match(match_text):
+            return False
+
+        # Проверка на слишком короткие "ссылки"
+        if len(match_text) < 5:
+            return False
+
+        # Проверка на случайные слова с точками
+        if "." in match_text and not any(c in match_text for c in "/:@"):
+            parts = match_text.split(".")
+            # Если это просто слово.точка.слово без других признаков ссылки
+            if len(parts) == 2 and len(parts[0]) < 4 and len(parts[1]) < 4:
+                return False
+
+        return True
+
+    def has_suspicious_domain(self, clean_text: str, windows=None) -> bool:
+        """
+        Проверка на скрытые ссылки с использованием Unicode или обфускации
+        """
+        return self.suspicious_domain(clean_text, windows) is not None
+
+    def suspicious_domain(self, clean_text: str, windows=None) -> str | None:
+        """
+        Скрытая ссылка (слово с доменом) или None.
+        Проверяется первое совпадение каждого паттерна
+        """
+        _, domain = next(cyrillic_domains(clean_text), (0, None))
+        if domain:
+            return domain
+
+        if windows is None:
+            windows = positioned_windows(clean_text)
+        _, domain = next(dotted_domains(windows), (0, None))
+        return domain
+
+    def suspicious_domains(
+        self, clean_text: str, windows=None, spans=()
+    ) -> list[str]:
+        """
+        Все скрытые ссылки (слова с доменом), а не только первые совпадения:
+        для проверки по спискам доменов каждая из них должна быть разрешена.
+        windows — окна с позициями в тексте (position, window), совпадения
+        внутри уже найденных ссылок (spans) пропускаются
+        """
+        if windows is None:
+            windows = positioned_windows(clean_text)
+        return [
+            domain
+            for position, domain in chain(
+                cyrillic_domains(clean_text), dotted_domains(windows)
+            )
+            if domain and not in_spans(spans, position)
+        ]
@@ -0,0 +1,120 @@
+import re
+
+
+# Невидимые и форматирующие символы, которыми разбивают ссылки
+INVISIBLE_CHARACTERS = (
+    "\u00ad"  # мягкий перенос
+    "\u034f"  # combining grapheme joiner
+    "\u061c"  # arabic letter mark
+    "\u115f\u1160\u3164\uffa0"  # заполнители хангыль
+    "\u180e"  # mongolian vowel separator
+    "\u200b\u200c\u200d\u200e\u200f"  # zero-width и направление текста
+    "\u202a\u202b\u202c\u202d\u202e"
+    "\u2060\u2061\u2062\u2063\u2064"
+    "\u2066\u2067\u2068\u2069"
+    "\ufeff"
+)
+
+# Символы, похожие на точку и косую черту
+DOT_LIKE_CHARACTERS = "\u2024\u3002\ufe52\uff61\u0701\u0702\u2e3c"
+SLASH_LIKE_CHARACTERS = "\u2044\u2215\u29f8"
+
+# Таблица очистки: невидимые символы удаляются, полноширинные формы
+# (U+FF01..U+FF5E) и похожие на точку символы заменяются на ASCII
+CLEANUP_TABLE = str.maketrans(
+    {
+        **{character: None for character in INVISIBLE_CHARACTERS},
+        **{code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)},
+        **{character: "." for character in DOT_LIKE_CHARACTERS},
+        **{character: "/" for character in SLASH_LIKE_CHARACTERS},
+        "\u3000": " ",
+    }
+)
+# Поиск по классу символов быстрее, чем translate по всему тексту
+CLEANUP_PATTERN = re.compile(
+    "[%s]" % re.escape("".join(chr(code) for code in CLEANUP_TABLE))
+)
+
+# Кириллические и греческие буквы, неотличимые от латинских
+# fmt: off
+CONFUSABLES = {
+    "а": "a", "в": "b", "е": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+    "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "ѕ": "s", "і": "i",
+    "ј": "j", "ԁ": "d", "һ": "h", "ӏ": "l", "ԛ": "q", "ԝ": "w", "ү": "y",
+    "А": "A", "В": "B", "Е": "E", "К": "K", "М": "M", "Н": "H", "О": "O",
+    "Р": "P", "С": "C", "Т": "T", "Х": "X", "У": "Y", "Ѕ": "S", "І": "I",
+    "Ј": "J", "Ԁ": "D", "Һ": "H", "Ӏ": "I", "Ԛ": "Q", "Ԝ": "W",
+    "α": "a", "ε": "e", "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p",
+    "τ": "t", "υ": "u", "χ": "x",
+    "Α": "A", "Β": "B", "Ε": "E", "Ζ": "Z", "Η": "H", "Ι": "I", "Κ": "K",
+    "Μ": "M", "Ν": "N", "Ο": "O", "Ρ": "P", "Τ": "T", "Υ": "Y", "Χ": "X",
+}
+# fmt: on
+CONFUSABLES_TABLE = str.maketrans(CONFUSABLES)
+CONFUSABLE_PATTERN = re.compile("[%s]" % "".join(CONFUSABLES))
+LATIN_PATTERN = re.compile(r"[A-Za-z]")
+# Слова с признаками ссылки (поиск начинается только с начала слова)
+LINK_TOKEN_PATTERN = re.compile(r"(?<!\S)[^\s.@:]*[.@:]\S*")
+LETTERS_PATTERN = re.compile(r"[^\W\d_]+")
+
+# Доменные зоны, перед которыми собираются разбитые точки
+PLAIN_TLDS = "com|org|net|biz|ru|рф|su|ua|kz|io|cc|ly|gg|tk|xyz"
+# Зоны, совпадающие с обычными словами ("Shop now", "Me too"): перед ними
+# точка с пробелами без скобок собирается, только если за зоной следует
+# путь ("t . me/spam") или конец строки
+WORD_TLDS = "by|me|to|co|top|site|online|shop|store|link|club|pro|app|dev|info"
+OBFUSCATED_TLDS = f"{PLAIN_TLDS}|{WORD_TLDS}"
+
+# Разбитые точки перед доменной зоной: "t . me", "site(dot)ru",
+# "site [.] ru", "site точка ru". Пробелы ограничены по длине,
+# чтобы длинные последовательности пробелов не приводили к перебору,
+# а опережающая проверка быстро отсекает позиции без пробела или скобки
+SPACED_DOT_PATTERN = re.compile(
+    r"(?=[\s(\[{])(?<=[^\W_])"
+    r"(?:(?:[^\S\n]{0,3}[(\[{][^\S\n]{0,2}(?:dot|точка|\.)[^\S\n]{0,2}[)\]}][^\S\n]{0,3}"
+    r"|[^\S\n]{1,3}(?:dot|точка)[^\S\n]{1,3})"
+    r"(?=(?:%s)(?![^\W\d_]))"
+    r"|[^\S\n]{1,3}\.[^\S\n]{0,3}"
+    r"(?=(?:%s)(?![^\W\d_])|(?:%s)(?:/|[^\S\n]*(?:\n|\Z))))"
+    % (OBFUSCATED_TLDS, PLAIN_TLDS, WORD_TLDS),
+    re.IGNORECASE,
+)
+
+
+def fold_mixed_letters(match) -> str:
+    letters = match.group()
+    if LATIN_PATTERN.search(letters) and CONFUSABLE_PATTERN.search(letters):
+        return letters.translate(CONFUSABLES_TABLE)
+    return letters
+
+
+def fold_token(match) -> str:
+    token = match.group()
+    if LATIN_PATTERN.search(token) and CONFUSABLE_PATTERN.search(token):
+        return LETTERS_PATTERN.sub(fold_mixed_letters, token)
+    return token
+
+
+def fold_confusables(text: str) -> str:
+    """
+    Заменяет похожие на латиницу буквы в словах с признаками ссылки.
+    Заменяются только части слова, где латиница смешана с кириллицей
+    или греческим ("spаm.com"), поэтому обычные русские слова
+    ("Samsung.Ура") не изменяются
+    """
+    if not LATIN_PATTERN.search(text) or not CONFUSABLE_PATTERN.search(text):
+        return text
+    return LINK_TOKEN_PATTERN.sub(fold_token, text)
+
+
+def normalize(text: str) -> str:
+    """
+    Приводит обфусцированные ссылки к обычному виду перед проверкой:
+    удаляет невидимые символы, заменяет полноширинные формы и похожие
+    буквы, собирает разбитые точки перед доменной зоной
+    """
+    if text.isascii():
+        return SPACED_DOT_PATTERN.sub(".", text)
+    if CLEANUP_PATTERN.search(text):
+        text = text.translate(CLEANUP_TABLE)
+    return fold_confusables(SPACED_DOT_PATTERN.sub(".", text))
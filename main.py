@@ -4,11 +4,19 @@ from db import POSTGRES
 import asyncio
 
 
+# Ключ блокировки, под которой создается схема базы данных
+SCHEMA_LOCK_ID = 7250417
+
+
 def main() -> None:
     postgres = POSTGRES()
     if postgres.connect() != None:
         # Создание таблицы для групп, если она не существует
         cursor = postgres.get_connection().cursor()
+        # Экземпляры бота, запущенные одновременно, создают схему по очереди
+        # (до конца транзакции), иначе CREATE OR REPLACE FUNCTION в двух
+        # транзакциях завершается ошибкой "tuple concurrently updated"
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_ID,))
         cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS telegram_groups (
@@ -20,6 +28,207 @@ def main() -> None:
             )
         """
         )
+        # Уведомления об изменении списка групп для всех экземпляров бота
+        cursor.execute(
+            """
+            CREATE OR REPLACE FUNCTION notify_telegram_groups() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    PERFORM pg_notify('telegram_groups', json_build_object(
+                        'op', TG_OP, 'chat_id', OLD.chat_id
+                    )::text);
+                ELSE
+                    PERFORM pg_notify('telegram_groups', json_build_object(
+                        'op', TG_OP, 'chat_id', NEW.chat_id, 'title', NEW.title
+                    )::text);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """
+        )
+        # Триггер создается только один раз: DROP TRIGGER при каждом запуске
+        # блокировал бы таблицу для всех работающих экземпляров
+        cursor.execute(
+            """
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_trigger
+                    WHERE tgname = 'telegram_groups_notify'
+                    AND tgrelid = 'telegram_groups'::regclass
+                ) THEN
+                    CREATE TRIGGER telegram_groups_notify
+                    AFTER INSERT OR DELETE OR UPDATE OF chat_id, title
+                    ON telegram_groups
+                    FOR EACH ROW EXECUTE FUNCTION notify_telegram_groups();
+                END IF;
+            END
+            $$
+        """
+        )
+        # Создание таблицы отложенных удалений уведомлений
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scheduled_deletions (
+                chat_id BIGINT NOT NULL,
+                message_id BIGINT NOT NULL,
+                delete_at TIMESTAMPTZ NOT NULL,
+                PRIMARY KEY (chat_id, message_id)
+            )
+        """
+        )
+        # Создание таблиц журнала доставки рассылок
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS broadcast_runs (
+                campaign VARCHAR(32) NOT NULL,
+                run_date DATE NOT NULL,
+                message TEXT NOT NULL,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP,
+                PRIMARY KEY (campaign, run_date)
+            )
+        """
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS broadcast_deliveries (
+                campaign VARCHAR(32) NOT NULL,
+                run_date DATE NOT NULL,
+                chat_id BIGINT NOT NULL,
+                delivered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (campaign, run_date, chat_id)
+            )
+        """
+        )
+        # Создание таблицы журнала модерации и доставки
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS moderation_events (
+                id BIGSERIAL PRIMARY KEY,
+                created_at TIMESTAMPTZ NOT NULL,
+                event VARCHAR(32) NOT NULL,
+                chat_id BIGINT NOT NULL,
+                user_id BIGINT,
+                message_ids BIGINT[],
+                reason VARCHAR(32),
+                detail TEXT,
+                content TEXT
+            )
+        """
+        )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS ix_moderation_events_chat_created
+            ON moderation_events (chat_id, created_at)
+        """
+        )
+        # Создание таблицы заявок на обратный звонок
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS call_requests (
+                id BIGSERIAL PRIMARY KEY,
+                user_id BIGINT NOT NULL,
+                username VARCHAR(255),
+                full_name VARCHAR(255),
+                chat_id BIGINT,
+                message_id BIGINT,
+                created_at TIMESTAMPTZ NOT NULL
+            )
+        """
+        )
+        # Создание таблицы статистики переходов по /start
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS start_attribution (
+                day DATE NOT NULL,
+                source VARCHAR(16) NOT NULL,
+                key VARCHAR(64) NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, source, key)
+            )
+        """
+        )
+        # Создание таблицы изображений, отмеченных как спам
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS spam_images (
+                file_unique_id VARCHAR(64) PRIMARY KEY,
+                hash BIGINT NOT NULL,
+                added_by BIGINT,
+                chat_id BIGINT,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """
+        )
+        # Создание таблицы разрешенных и запрещенных доменов
+        # (chat_id = 0 — правила для всех групп)
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS domain_rules (
+                chat_id BIGINT NOT NULL DEFAULT 0,
+                domain VARCHAR(253) NOT NULL,
+                action VARCHAR(8) NOT NULL CHECK (action IN ('allow', 'deny')),
+                added_by BIGINT,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (chat_id, domain)
+            )
+        """
+        )
+        # Уведомления об изменении правил для всех экземпляров бота
+        cursor.execute(
+            """
+            CREATE OR REPLACE FUNCTION notify_domain_rules() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    PERFORM pg_notify('domain_rules', json_build_object(
+                        'op', TG_OP, 'chat_id', OLD.chat_id, 'domain', OLD.domain
+                    )::text);
+                ELSE
+                    PERFORM pg_notify('domain_rules', json_build_object(
+                        'op', TG_OP, 'chat_id', NEW.chat_id, 'domain', NEW.domain,
+                        'action', NEW.action
+                    )::text);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """
+        )
+        cursor.execute(
+            """
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_trigger
+                    WHERE tgname = 'domain_rules_notify'
+                    AND tgrelid = 'domain_rules'::regclass
+                ) THEN
+                    CREATE TRIGGER domain_rules_notify
+                    AFTER INSERT OR DELETE OR UPDATE OF action ON domain_rules
+                    FOR EACH ROW EXECUTE FUNCTION notify_domain_rules();
+                END IF;
+            END
+            $$
+        """
+        )
+        # Создание таблицы задач планировщика (схема APScheduler SQLAlchemyJobStore)
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS apscheduler_jobs (
+                id VARCHAR(191) PRIMARY KEY,
+                next_run_time DOUBLE PRECISION,
+                job_state BYTEA NOT NULL
+            )
+        """
+        )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS ix_apscheduler_jobs_next_run_time
+            ON apscheduler_jobs (next_run_time)
+        """
+        )
         postgres.get_connection().commit()
         cursor.close()
 
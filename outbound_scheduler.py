@@ -0,0 +1,117 @@
+import time
+import heapq
+import asyncio
+import itertools
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+
+# Классы приоритета запросов к Bot API (меньше — важнее).
+# Значения не равны нулю: ExtBot отбрасывает пустые rate_limit_args
+PRIORITY_MODERATION = 1
+PRIORITY_ADMIN_LOOKUP = 2
+PRIORITY_NOTICE = 3
+PRIORITY_BROADCAST = 4
+
+# Приоритет по методу API, если он не передан явно через rate_limit_args
+ENDPOINT_PRIORITIES = {
+    "deleteMessage": PRIORITY_MODERATION,
+    "deleteMessages": PRIORITY_MODERATION,
+    "getChatAdministrators": PRIORITY_ADMIN_LOOKUP,
+    "getChatMember": PRIORITY_ADMIN_LOOKUP,
+}
+
+
+class OutboundScheduler(BaseRateLimiter[int]):
+    """
+    Общий планировщик исходящих запросов к Bot API.
+    Все вызовы context.bot и application.bot проходят через него: запросы
+    ждут в очереди с приоритетами и выпускаются в пределах общего лимита
+    rate запросов в секунду. Удаление спама выполняется раньше проверок
+    администраторов, уведомлений и рассылок. При RetryAfter выдача
+    приостанавливается для всех запросов, а запрос повторяется.
+    """
+
+    def __init__(self, rate: float = 30, max_retries: int = 3):
+        self.__rate = rate
+        self.__max_retries = max_retries
+        self.__tokens = rate
+        self.__updated_at = time.monotonic()
+        self.__paused_until = 0.0
+        self.__waiting: list[tuple[int, int, asyncio.Future]] = []
+        self.__counter = itertools.count()
+        self.__wakeup = asyncio.Event()
+        self.__task: asyncio.Task | None = None
+
+    async def initialize(self):
+        if self.__task is None:
+            self.__task = asyncio.create_task(self.__dispatch())
+
+    async def shutdown(self):
+        if self.__task:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+    def queue_size(self) -> int:
+        """Число запросов, ожидающих отправки"""
+        return len(self.__waiting)
+
+    async def process_request(
+        self, callback, args, kwargs, endpoint, data, rate_limit_args
+    ):
+        priority = rate_limit_args or ENDPOINT_PRIORITIES.get(
+            endpoint, PRIORITY_NOTICE
+        )
+
+        for attempt in range(self.__max_retries + 1):
+            await self.__acquire(priority)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == self.__max_retries:
+                    raise
+                retry_after = e.retry_after
+                if not isinstance(retry_after, (int, float)):
+                    retry_after = retry_after.total_seconds()
+                print(f"⚠️ Превышен лимит Telegram ({endpoint}), пауза {retry_after} с")
+                self.__paused_until = max(
+                    self.__paused_until, time.monotonic() + retry_after
+                )
+                self.__tokens = 0
+
+    async def __acquire(self, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.__waiting, (priority, next(self.__counter), future))
+        self.__wakeup.set()
+        await future
+
+    async def __dispatch(self):
+        while True:
+            if not self.__waiting:
+                self.__wakeup.clear()
+                await self.__wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            if self.__paused_until > now:
+                await asyncio.sleep(self.__paused_until - now)
+                continue
+
+            self.__tokens = min(
+                self.__rate, self.__tokens + (now - self.__updated_at) * self.__rate
+            )
+            self.__updated_at = now
+            if self.__tokens < 1:
+                await asyncio.sleep((1 - self.__tokens) / self.__rate)
+                continue
+
+            _, _, future = heapq.heappop(self.__waiting)
+            if future.done():
+                # Запрос отменен, пока ждал очереди
+                continue
+            self.__tokens -= 1
+            future.set_result(None)
@@ -0,0 +1,218 @@
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import (
+    BrokenExecutor,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from link_detector import LinkDetector
+
+
+# Копия детектора в процессе пула (передается при запуске процесса)
+_worker_detector: LinkDetector | None = None
+
+
+def _init_worker(detector: LinkDetector):
+    global _worker_detector
+    _worker_detector = detector
+
+
+def _run_in_worker(method: str, text: str, submitted_at: float) -> tuple:
+    started_at = time.time()
+    return getattr(_worker_detector, method)(text), started_at - submitted_at
+
+
+class ScanExecutor:
+    """
+    Выполнение проверки текста на ссылки вне event loop.
+    Короткие тексты (меньше threshold символов) проверяются сразу,
+    длинные передаются в пул процессов или потоков. Очередь пула
+    ограничена max_pending: при переполнении текст проверяется сразу.
+    Если пул сломан (например, процесс завершен из-за нехватки памяти),
+    он создается заново, а текст проверяется сразу.
+    Если проверка в пуле не завершилась за timeout секунд, текст проверяется
+    сразу: время такой проверки ограничено бюджетом детектора (time_budget).
+    Превышение бюджета дает неопределенный результат (None).
+    Также выполняется поиск всех ссылок для проверки по спискам доменов.
+    """
+
+    def __init__(
+        self,
+        detector: LinkDetector,
+        threshold: int = 1024,
+        mode: str = "process",
+        workers: int = 2,
+        max_pending: int = 64,
+        timeout: float = 0.5,
+    ):
+        self.__detector = detector
+        self.__threshold = threshold
+        self.__mode = mode
+        self.__workers = workers
+        self.__max_pending = max_pending
+        self.__timeout = timeout
+        self.__executor: Executor | None = None
+        self.__pending = 0
+        self.__pending_lock = threading.Lock()
+        self.inline = 0
+        self.offloaded = 0
+        self.overflows = 0
+        self.timeouts = 0
+        self.restarts = 0
+        # Неопределенные результаты, в том числе превышения бюджета времени
+        # детектора в процессах пула (их счетчики в основной процесс не попадают)
+        self.undecided = 0
+        self.__completed = 0
+        self.__queue_wait_total = 0.0
+        self.__queue_wait_max = 0.0
+
+    async def start(self):
+        """
+        Создает пул (в режиме "inline" все проверки выполняются сразу)
+        """
+        self.__executor = self.__create_pool()
+        print(f"✅ Проверка длинных текстов: {self.__mode}, порог {self.__threshold}")
+
+    def __create_pool(self) -> Executor | None:
+        if self.__mode == "process":
+            # spawn: дочерние процессы не наследуют соединения и потоки бота
+            executor = ProcessPoolExecutor(
+                max_workers=self.__workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.__detector,),
+            )
+            # Процессы запускаются заранее, чтобы первая проверка не ждала импорта
+            for _ in range(self.__workers):
+                executor.submit(_run_in_worker, "scan", "", time.time())
+            return executor
+        if self.__mode == "thread":
+            return ThreadPoolExecutor(
+                max_workers=self.__workers, thread_name_prefix="scan"
+            )
+        return None
+
+    def __restart_pool(self, broken: Executor):
+        # Несколько проверок могут обнаружить один и тот же сломанный пул
+        if self.__executor is not broken:
+            return
+        self.restarts += 1
+        print("⚠️ Пул проверки текстов сломан, создается заново")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.__executor = self.__create_pool()
+
+    async def stop(self):
+        if self.__executor:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+    async def scan(self, text: str) -> bool | None:
+        """
+        Проверяет нормализованный текст (см. LinkDetector.scan),
+        None, если результат не определен
+        """
+        return await self.__run("scan", text)
+
+    async def find_links(self, text: str) -> list[str] | None:
+        """
+        Все ссылки в нормализованном тексте (см. LinkDetector.find_links),
+        None, если поиск не уложился в бюджет времени детектора
+        """
+        return await self.__run("find_links", text)
+
+    async def __run(self, method: str, text: str):
+        result = await self.__dispatch(method, text)
+        if result is None:
+            self.undecided += 1
+        return result
+
+    async def __dispatch(self, method: str, text: str):
+        run_inline = getattr(self.__detector, method)
+        if self.__executor is None or len(text) < self.__threshold:
+            self.inline += 1
+            return run_inline(text)
+
+        with self.__pending_lock:
+            if self.__pending >= self.__max_pending:
+                overflow = True
+            else:
+                overflow = False
+                self.__pending += 1
+        if overflow:
+            self.overflows += 1
+            self.inline += 1
+            return run_inline(text)
+
+        self.offloaded += 1
+        executor = self.__executor
+        try:
+            if self.__mode == "process":
+                future = executor.submit(_run_in_worker, method, text, time.time())
+            else:
+                future = executor.submit(
+                    self.__run_in_thread, run_inline, text, time.time()
+                )
+        except Exception as e:
+            self.__release(None)
+            print(f"❌ Ошибка при передаче текста в пул: {e}")
+            if isinstance(e, BrokenExecutor):
+                self.__restart_pool(executor)
+            return run_inline(text)
+        # Место в очереди освобождается, когда проверка действительно закончилась,
+        # а не когда истек timeout
+        future.add_done_callback(self.__release)
+
+        try:
+            result, queue_wait = await asyncio.wait_for(
+                asyncio.wrap_future(future), self.__timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            print(
+                f"⚠️ Проверка текста ({len(text)} символов) не завершилась "
+                f"за {self.__timeout} с, проверяется сразу"
+            )
+            return run_inline(text)
+        except Exception as e:
+            # Например, процесс пула завершился аварийно
+            print(f"❌ Ошибка при проверке текста в пуле: {e}")
+            if isinstance(e, BrokenExecutor):
+                self.__restart_pool(executor)
+            return run_inline(text)
+
+        self.__completed += 1
+        self.__queue_wait_total += queue_wait
+        self.__queue_wait_max = max(self.__queue_wait_max, queue_wait)
+        return result
+
+    @staticmethod
+    def __run_in_thread(run, text: str, submitted_at: float) -> tuple:
+        started_at = time.time()
+        return run(text), started_at - submitted_at
+
+    def __release(self, future):
+        with self.__pending_lock:
+            self.__pending -= 1
+
+    def stats(self) -> dict:
+        """
+        Доля проверок в пуле и время ожидания в очереди пула
+        """
+        total = self.inline + self.offloaded
+        return {
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+            "offload_rate": self.offloaded / total if total else 0.0,
+            "overflows": self.overflows,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+            "undecided": self.undecided,
+            "pending": self.__pending,
+            "queue_wait_avg": (
+                self.__queue_wait_total / self.__completed if self.__completed else 0.0
+            ),
+            "queue_wait_max": self.__queue_wait_max,
+        }
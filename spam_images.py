@@ -0,0 +1,173 @@
+import io
+import asyncio
+import numpy as np
+from collections import OrderedDict
+from PIL import Image
+
+
+# Перцептивный хэш (pHash): DCT уменьшенного до 32x32 изображения в оттенках
+# серого, 64 бита — коэффициенты низких частот 8x8 больше или меньше медианы
+IMAGE_SIZE = 32
+HASH_SIZE = 8
+DCT_MATRIX = np.cos(
+    np.pi
+    * np.outer(np.arange(IMAGE_SIZE), 2 * np.arange(IMAGE_SIZE) + 1)
+    / (2 * IMAGE_SIZE)
+)
+
+
+def phash(data: bytes) -> int:
+    """
+    64-битный перцептивный хэш изображения
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEG декодируется сразу в уменьшенном размере
+        image.draft("L", (IMAGE_SIZE * 4, IMAGE_SIZE * 4))
+        pixels = np.asarray(
+            image.convert("L").resize(
+                (IMAGE_SIZE, IMAGE_SIZE), Image.Resampling.LANCZOS
+            ),
+            dtype=np.float64,
+        )
+    dct = DCT_MATRIX @ pixels @ DCT_MATRIX.T
+    block = dct[:HASH_SIZE, :HASH_SIZE].flatten()
+    # Постоянная составляющая (яркость) не участвует в медиане
+    bits = block > np.median(block[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def to_signed(value: int) -> int:
+    """64-битный хэш для столбца BIGINT"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class HashIndex:
+    """
+    Поиск хэшей на расстоянии Хэмминга не больше max_distance
+    (multi-index hashing). Хэш делится на max_distance + 1 частей: у близких
+    хэшей хотя бы одна часть совпадает, поэтому сравниваются только хэши
+    из тех же корзин, а не весь список.
+    """
+
+    def __init__(self, max_distance: int):
+        self.__max_distance = max_distance
+        parts = max_distance + 1
+        self.__bounds = [64 * i // parts for i in range(parts + 1)]
+        self.__tables: list[dict[int, list[int]]] = [{} for _ in range(parts)]
+        self.__hashes: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.__hashes)
+
+    def __parts(self, value: int):
+        for start, end in zip(self.__bounds, self.__bounds[1:]):
+            yield (value >> start) & ((1 << (end - start)) - 1)
+
+    def add(self, value: int):
+        if value in self.__hashes:
+            return
+        self.__hashes.add(value)
+        for table, part in zip(self.__tables, self.__parts(value)):
+            table.setdefault(part, []).append(value)
+
+    def find(self, value: int) -> tuple[int, int] | None:
+        """
+        Ближайший хэш: (расстояние, хэш) или None
+        """
+        best = None
+        for table, part in zip(self.__tables, self.__parts(value)):
+            for candidate in table.get(part, ()):
+                distance = (candidate ^ value).bit_count()
+                if distance <= self.__max_distance and (
+                    best is None or distance < best[0]
+                ):
+                    best = (distance, candidate)
+        return best
+
+
+class SpamImages:
+    """
+    Изображения, отмеченные администраторами как спам.
+    Хэши хранятся в spam_images и индексируются в памяти. Входящие фото
+    проверяются по file_unique_id (без скачивания), затем по перцептивному
+    хэшу: пересжатые и слегка измененные копии баннера тоже находятся.
+    Проверяется самый маленький размер фото, этого достаточно для хэша.
+    """
+
+    def __init__(self, db, max_distance: int = 6, cache_size: int = 50000):
+        self.__db = db
+        self.__max_distance = max_distance
+        self.__index = HashIndex(max_distance)
+        self.__spam_ids: set[str] = set()
+        # Хэши уже скачанных фото по file_unique_id
+        self.__cache_size = cache_size
+        self.__hashes: OrderedDict[str, int] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    async def load(self):
+        """
+        Загружает хэши из базы данных
+        """
+        rows = await self.__db.fetchall(
+            "SELECT file_unique_id, hash FROM spam_images"
+        )
+        self.__index = HashIndex(self.__max_distance)
+        self.__spam_ids = set()
+        for file_unique_id, value in rows:
+            self.__spam_ids.add(file_unique_id)
+            self.__index.add(value & ((1 << 64) - 1))
+        print(f"✅ Загружено спам-изображений: {len(self.__spam_ids)}")
+
+    async def hash_photo(self, bot, photo) -> int:
+        """
+        Хэш фото (PhotoSize), повторно одно и то же фото не скачивается
+        """
+        value = self.__hashes.get(photo.file_unique_id)
+        if value is not None:
+            self.__hashes.move_to_end(photo.file_unique_id)
+            return value
+
+        file = await bot.get_file(photo.file_id)
+        data = await file.download_as_bytearray()
+        value = await asyncio.to_thread(phash, bytes(data))
+
+        self.__hashes[photo.file_unique_id] = value
+        while len(self.__hashes) > self.__cache_size:
+            self.__hashes.popitem(last=False)
+        return value
+
+    async def contains(self, bot, photos: tuple) -> bool:
+        """
+        Проверяет фото сообщения (message.photo)
+        """
+        if not photos or not len(self.__index):
+            return False
+        photo = photos[0]
+        if photo.file_unique_id in self.__spam_ids:
+            return True
+
+        try:
+            match = self.__index.find(await self.hash_photo(bot, photo))
+        except Exception as e:
+            print(f"❌ Ошибка при проверке изображения: {e}")
+            return False
+        if match:
+            print(f"🖼 Найдено спам-изображение (расстояние {match[0]})")
+        return match is not None
+
+    async def add(self, bot, photos: tuple, added_by: int, chat_id: int) -> int:
+        """
+        Отмечает фото сообщения как спам, возвращает его хэш
+        """
+        photo = photos[0]
+        value = await self.hash_photo(bot, photo)
+        await self.__db.execute(
+            "INSERT INTO spam_images (file_unique_id, hash, added_by, chat_id) "
+            "VALUES (%s, %s, %s, %s) ON CONFLICT (file_unique_id) DO NOTHING",
+            (photo.file_unique_id, to_signed(value), added_by, chat_id),
+        )
+        self.__spam_ids.add(photo.file_unique_id)
+        self.__index.add(value)
+        return value
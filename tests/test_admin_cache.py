@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+from telegram import ChatMember
+from admin_cache import AdminCache
+
+
+CHAT_ID = -100123
+
+
+class FakeBot:
+    def __init__(self, admins, fail=False):
+        self.admins = admins
+        self.fail = fail
+        self.requests = 0
+
+    async def get_chat_administrators(self, chat_id):
+        self.requests += 1
+        if self.fail:
+            raise RuntimeError("Timed out")
+        return [SimpleNamespace(user=SimpleNamespace(id=i)) for i in self.admins]
+
+
+def member_update(user_id: int, status: str):
+    return SimpleNamespace(
+        chat=SimpleNamespace(id=CHAT_ID),
+        new_chat_member=SimpleNamespace(
+            user=SimpleNamespace(id=user_id), status=status
+        ),
+    )
+
+
+def test_updates_change_loaded_roster():
+    async def run():
+        cache = AdminCache(ttl=600)
+        bot = FakeBot({1})
+        assert await cache.is_admin(bot, CHAT_ID, 1)
+        cache.apply_update(member_update(2, ChatMember.ADMINISTRATOR))
+        cache.apply_update(member_update(1, ChatMember.MEMBER))
+        return await cache.get_admins(bot, CHAT_ID), bot.requests
+
+    assert asyncio.run(run()) == ({2}, 1)
+
+
+def test_update_resets_roster_after_failed_load():
+    async def run():
+        cache = AdminCache(ttl=600, error_ttl=60)
+        bot = FakeBot({1, 2}, fail=True)
+        assert await cache.get_admins(bot, CHAT_ID) == set()
+        bot.fail = False
+        cache.apply_update(member_update(2, ChatMember.ADMINISTRATOR))
+        return await cache.get_admins(bot, CHAT_ID), bot.requests
+
+    assert asyncio.run(run()) == ({1, 2}, 2)
@@ -0,0 +1,57 @@
+import pytest
+from domain_rules import DomainRules, extract_host
+from link_detector import LinkDetector
+
+
+@pytest.fixture(scope="module")
+def detector():
+    return LinkDetector(time_budget=60)
+
+
+@pytest.fixture(scope="module")
+def rules():
+    # Без базы данных действуют только встроенные правила
+    return DomainRules(None, builtin_allow=["mebel.com"])
+
+
+@pytest.mark.parametrize(
+    "link, host",
+    [
+        ("https://user@Shop.ru:8080/path", "shop.ru"),
+        ("(mebel.com),", "mebel.com"),
+        ("«www.mebel.com»", "www.mebel.com"),
+        ("@manager", None),
+    ],
+)
+def test_extract_host(link, host):
+    assert extract_host(link) == host
+
+
+@pytest.mark.parametrize(
+    "text, allowed",
+    [
+        ("mebel.com", True),
+        ("Каталог: (mebel.com), www.mebel.com!", True),
+        # Каждое слово с доменом проверяется, а не только первое
+        ("mebel.com купи-диван.com", False),
+        ("mebel.com и a.b.c.shop", False),
+        ("mebel.com https://spam.ru", False),
+        # Длинная ссылка с метками: путь в следующем окне слова
+        # не считается отдельной ссылкой
+        (
+            "Наш диван: https://mebel.com/catalog/sofa?"
+            + "&".join(f"utm_param{i}=value{i}" for i in range(25))
+            + "&img=/images/sofa.jpg",
+            True,
+        ),
+        (
+            "https://mebel.com/catalog?"
+            + "&".join(f"utm_param{i}=value{i}" for i in range(25))
+            + '"spam.ru/x',
+            False,
+        ),
+    ],
+)
+def test_allows_all(detector, rules, text, allowed):
+    assert detector.scan(text)
+    assert rules.allows_all(1, detector.find_links(text)) == allowed
@@ -0,0 +1,101 @@
+import flood_detector
+from flood_detector import FloodDetector
+
+
+CHAT_ID = -100123
+OTHER_CHAT_ID = -100456
+USER_ID = 42
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_detector(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(flood_detector.time, "monotonic", clock)
+    return FloodDetector(**kwargs), clock
+
+
+def tracked_users(detector: FloodDetector) -> int:
+    return len(detector._FloodDetector__users)
+
+
+def test_flood_after_max_messages_within_window(monkeypatch):
+    detector, clock = make_detector(monkeypatch, window=60, max_messages=3)
+    verdicts = []
+    for _ in range(3):
+        verdicts.append(detector.check(CHAT_ID, USER_ID, None))
+        clock.now += 10
+    assert verdicts == [None, None, "flood"]
+
+
+def test_no_flood_when_messages_spread_over_window(monkeypatch):
+    detector, clock = make_detector(monkeypatch, window=60, max_messages=3)
+    verdicts = []
+    for _ in range(5):
+        verdicts.append(detector.check(CHAT_ID, USER_ID, None))
+        clock.now += 31
+    assert verdicts == [None] * 5
+
+
+def test_flood_is_counted_per_chat(monkeypatch):
+    detector, _ = make_detector(monkeypatch, max_messages=3)
+    verdicts = [
+        detector.check(chat_id, USER_ID, None)
+        for chat_id in (CHAT_ID, OTHER_CHAT_ID, CHAT_ID, OTHER_CHAT_ID)
+    ]
+    assert verdicts == [None] * 4
+
+
+def test_duplicate_across_chats(monkeypatch):
+    detector, clock = make_detector(
+        monkeypatch, window=60, max_messages=10, max_duplicates=3
+    )
+    verdicts = []
+    for chat_id in (CHAT_ID, OTHER_CHAT_ID, -100789):
+        verdicts.append(detector.check(chat_id, USER_ID, b"same"))
+        clock.now += 5
+    assert verdicts == [None, None, "duplicate"]
+    # Другое содержимое не считается повтором
+    assert detector.check(CHAT_ID, USER_ID, b"other") is None
+
+
+def test_duplicate_outside_window_is_allowed(monkeypatch):
+    detector, clock = make_detector(monkeypatch, window=60, max_duplicates=2)
+    assert detector.check(CHAT_ID, USER_ID, b"same") is None
+    clock.now += 61
+    assert detector.check(CHAT_ID, USER_ID, b"same") is None
+
+
+def test_idle_users_are_evicted(monkeypatch):
+    detector, clock = make_detector(monkeypatch, window=60, idle_ttl=600)
+    for user_id in range(10):
+        detector.check(CHAT_ID, user_id, b"text")
+    assert tracked_users(detector) == 10
+
+    clock.now += 300
+    detector.check(CHAT_ID, 0, None)
+    assert tracked_users(detector) == 10
+
+    clock.now += 301
+    detector.check(CHAT_ID, 0, None)
+    # Остался только пользователь, писавший 301 секунду назад
+    assert tracked_users(detector) == 1
+
+
+def test_users_over_limit_are_evicted_oldest_first(monkeypatch):
+    detector, clock = make_detector(monkeypatch, max_users=3, max_duplicates=2)
+    for user_id in range(5):
+        detector.check(CHAT_ID, user_id, b"text")
+        clock.now += 1
+    assert tracked_users(detector) <= 4
+
+    # Вытесненный пользователь начинает с пустых окон
+    assert detector.check(CHAT_ID, 0, b"text") is None
+    # Недавно активный пользователь сохранил свои окна
+    assert detector.check(CHAT_ID, 4, b"text") == "duplicate"
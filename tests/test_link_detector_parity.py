@@ -0,0 +1,65 @@
+import random
+import pytest
+from link_detector import LinkDetector
+from legacy_link_detector import contains_links as legacy_contains_links
+
+
+# Части, из которых собираются случайные сообщения: ссылки, упоминания,
+# разметка Markdown и HTML, кириллические домены и слова-исключения
+# fmt: off
+PIECES = [
+    "example.com", "www.", "http://", "https://x.ru/a?b#c", "t.me/", "tg://",
+    "@", "@user_name", "a.b", "abc.de", "abcd.ef", "1.2.3.4", "127.0.0.1",
+    "[", "]", "(", ")", "](", "<a href=\"", "\">", "</a>", "<b>", "</b>",
+    " ", "\n", ".", "сайт", ".рф", ".com", "comа", "test", "api.", "foo", "x",
+    "-", "_", "Привет", "localhost", "0.0.0.0", "mail@site.ru", "www.x@y.com",
+    ":8080", "/path", "FOO.BAR.BAZ", "localdomain", "sample.com.ru",
+    "a.example.com", "example.org.", "ftp.", "ru", "ZZ", ".НЕТ", "ёж.net",
+    "<", ">", "\"", "я",
+]
+# fmt: on
+CHARS = "ab.-:/@[]()<>\"= \nwмрф0123456789_яh"
+
+CASES = [
+    "",
+    "Привет, как дела?",
+    "see site.com",
+    "Заходите на мебель.рф",
+    "[сайт](https://example.com)",
+    '<a href="https://shop.ru">магазин</a>',
+    "пишите @manager",
+    "www.example.com",
+    "192.168.0.1",
+    # Разметка, которую старая очистка удаляла через несколько строк
+    'www./[".www.3[www.uwww.](9я\n6p6)01.2.3.4chttp://o',
+]
+
+
+def random_messages(seed: int, count: int):
+    rng = random.Random(seed)
+    for i in range(count):
+        if i % 2:
+            yield "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 10)))
+        else:
+            yield "".join(rng.choice(CHARS) for _ in range(rng.randint(0, 60)))
+
+
+@pytest.fixture(scope="module")
+def detector():
+    # Бюджет времени не должен влиять на результат сравнения
+    return LinkDetector(time_budget=60)
+
+
+@pytest.mark.parametrize("text", CASES)
+def test_known_cases(detector, text):
+    assert detector.scan(text) == legacy_contains_links(text)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_messages(detector, seed):
+    mismatches = [
+        text
+        for text in random_messages(seed, 5000)
+        if detector.scan(text) != legacy_contains_links(text)
+    ]
+    assert mismatches == []
@@ -0,0 +1,31 @@
+import pytest
+from link_normalizer import normalize
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Заходи t . me/spam_channel", "Заходи t.me/spam_channel"),
+        ("bit . ly/abc123 забирай", "bit.ly/abc123 забирай"),
+        ("Наш магазин super-mebel . ru", "Наш магазин super-mebel.ru"),
+        ("buy at site . com now", "buy at site.com now"),
+        ("Пишите в t (.) me, там скидки", "Пишите в t.me, там скидки"),
+        ("Подробности на site(dot)ru", "Подробности на site.ru"),
+        ("Скидки на mebel точка ru", "Скидки на mebel.ru"),
+    ],
+)
+def test_joins_spaced_dots(text, expected):
+    assert normalize(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "see you tomorrow . to be continued",
+        "Thanks . Pro tip: buy a sofa",
+        "Really . Me too",
+        "Hello world . Shop now",
+    ],
+)
+def test_keeps_sentences(text):
+    assert normalize(text) == text
@@ -0,0 +1,81 @@
+import time
+import asyncio
+import threading
+from link_detector import LinkDetector
+from scan_executor import ScanExecutor
+
+
+def test_over_budget_is_undecided():
+    detector = LinkDetector(time_budget=-1)
+    assert detector.scan("see site.com") is None
+    assert detector.find_links("see site.com") is None
+    assert detector.budget_exceeded == 2
+
+
+def test_executor_counts_undecided():
+    async def run():
+        executor = ScanExecutor(LinkDetector(time_budget=-1), mode="thread")
+        await executor.start()
+        try:
+            text = "see site.com " * 100
+            return await executor.scan(text), executor.stats()
+        finally:
+            await executor.stop()
+
+    verdict, stats = asyncio.run(run())
+    assert verdict is None
+    assert stats["offloaded"] == 1
+    assert stats["undecided"] == 1
+
+
+def test_broken_pool_falls_back_inline():
+    async def run():
+        executor = ScanExecutor(LinkDetector(), threshold=10, mode="process")
+        await executor.start()
+        try:
+            text = "see site.com " * 100
+            assert await executor.scan(text)
+            # Процессы пула завершаются аварийно (как при нехватке памяти)
+            pool = executor._ScanExecutor__executor
+            for process in list(pool._processes.values()):
+                process.kill()
+                process.join()
+            # Пул успевает заметить завершение процессов: submit выбрасывает
+            # BrokenProcessPool
+            await asyncio.sleep(0.5)
+            verdicts = [await executor.scan(text), await executor.scan(text)]
+            return verdicts, await executor.scan(text), executor.stats()
+        finally:
+            await executor.stop()
+
+    verdicts, after_restart, stats = asyncio.run(run())
+    assert verdicts == [True, True]
+    assert after_restart is True
+    assert stats["restarts"] == 1
+    assert stats["pending"] == 0
+
+
+class SlowPoolDetector(LinkDetector):
+    """Детектор, который медленно работает только в потоках пула"""
+
+    def scan(self, text):
+        if threading.current_thread() is not threading.main_thread():
+            time.sleep(0.3)
+        return super().scan(text)
+
+
+def test_timeout_falls_back_inline():
+    async def run():
+        executor = ScanExecutor(
+            SlowPoolDetector(), threshold=10, mode="thread", timeout=0.05
+        )
+        await executor.start()
+        try:
+            return await executor.scan("see site.com " * 100), executor.stats()
+        finally:
+            await executor.stop()
+
+    verdict, stats = asyncio.run(run())
+    assert verdict is True
+    assert stats["timeouts"] == 1
+    assert stats["undecided"] == 0
@@ -0,0 +1,77 @@
+import io
+import random
+import numpy as np
+from PIL import Image, ImageFilter
+from spam_images import HashIndex, phash, to_signed
+
+
+def flip_bits(value: int, count: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+def test_index_finds_every_hash_within_distance():
+    rng = random.Random(1)
+    max_distance = 6
+    index = HashIndex(max_distance)
+    hashes = [rng.getrandbits(64) for _ in range(200)]
+    # Близкие к уже добавленным хэши на всех расстояниях до max_distance + 2
+    hashes += [
+        flip_bits(rng.choice(hashes), rng.randint(0, max_distance + 2), rng)
+        for _ in range(200)
+    ]
+    for value in hashes:
+        index.add(value)
+    assert len(index) == len(set(hashes))
+
+    queries = [
+        flip_bits(rng.choice(hashes), rng.randint(0, max_distance + 2), rng)
+        for _ in range(2000)
+    ]
+    for query in queries:
+        distance = min((query ^ value).bit_count() for value in hashes)
+        found = index.find(query)
+        if distance <= max_distance:
+            assert found is not None and found[0] == distance
+            assert (found[1] ^ query).bit_count() == distance
+        else:
+            assert found is None
+
+
+def test_empty_index_finds_nothing():
+    assert HashIndex(6).find(0) is None
+
+
+def test_to_signed_fits_bigint():
+    assert to_signed(0) == 0
+    assert to_signed((1 << 63) - 1) == (1 << 63) - 1
+    assert to_signed((1 << 64) - 1) == -1
+    assert to_signed(1 << 63) == -(1 << 63)
+
+
+def banner(seed: int) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (8, 8, 3), dtype=np.uint8)
+    return Image.fromarray(pixels).resize((320, 240), Image.Resampling.BICUBIC)
+
+
+def encode(image: Image.Image, quality: int = 90) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def test_phash_matches_recompressed_copy():
+    original = banner(1)
+    value = phash(encode(original))
+    copies = [
+        encode(original, quality=40),
+        encode(original.resize((160, 120))),
+        encode(original.filter(ImageFilter.GaussianBlur(1))),
+    ]
+    for data in copies:
+        assert (phash(data) ^ value).bit_count() <= 6
+
+    # Другое изображение далеко
+    assert (phash(encode(banner(2))) ^ value).bit_count() > 12
@@ -0,0 +1,101 @@
+import asyncio
+import datetime
+from telegram import Chat, Message, Update
+from update_processor import ChatOrderedUpdateProcessor
+
+
+def chat_update(update_id: int, chat_id: int) -> Update:
+    message = Message(
+        message_id=update_id,
+        date=datetime.datetime.now(datetime.timezone.utc),
+        chat=Chat(id=chat_id, type=Chat.SUPERGROUP),
+    )
+    return Update(update_id=update_id, message=message)
+
+
+def test_updates_of_one_chat_run_in_order():
+    async def run():
+        processor = ChatOrderedUpdateProcessor(max_concurrent_updates=8)
+        order: dict[int, list[int]] = {}
+        running = 0
+        peak = 0
+
+        async def handle(update_id: int, chat_id: int):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            # Первые обновления обрабатываются дольше, чтобы поздние
+            # могли их обогнать при неверном порядке
+            await asyncio.sleep(0.01 if update_id % 5 == 0 else 0)
+            order.setdefault(chat_id, []).append(update_id)
+            running -= 1
+
+        tasks = []
+        for update_id in range(40):
+            chat_id = -100 - update_id % 4
+            tasks.append(
+                asyncio.create_task(
+                    processor.process_update(
+                        chat_update(update_id, chat_id), handle(update_id, chat_id)
+                    )
+                )
+            )
+        await asyncio.sleep(0)
+        depths = processor.queue_depths()
+        await asyncio.gather(*tasks)
+        return order, peak, depths, processor.queue_depths()
+
+    order, peak, depths, final_depths = asyncio.run(run())
+    for chat_id, update_ids in order.items():
+        assert update_ids == sorted(update_ids)
+        assert len(update_ids) == 10
+    # Разные чаты обрабатываются одновременно
+    assert peak > 1
+    assert sum(depths.values()) == 40
+    assert final_depths == {}
+
+
+def test_concurrency_is_limited_across_chats():
+    async def run():
+        processor = ChatOrderedUpdateProcessor(max_concurrent_updates=2)
+        running = 0
+        peak = 0
+
+        async def handle():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.005)
+            running -= 1
+
+        await asyncio.gather(
+            *(
+                processor.process_update(chat_update(i, -100 - i), handle())
+                for i in range(10)
+            )
+        )
+        return peak, processor.queue_depths()
+
+    assert asyncio.run(run()) == (2, {})
+
+
+def test_failed_update_releases_chat_queue():
+    async def run():
+        processor = ChatOrderedUpdateProcessor(max_concurrent_updates=4)
+
+        async def fail():
+            raise RuntimeError("handler failed")
+
+        async def succeed():
+            return None
+
+        results = await asyncio.gather(
+            processor.process_update(chat_update(1, -100), fail()),
+            processor.process_update(chat_update(2, -100), succeed()),
+            return_exceptions=True,
+        )
+        return results, processor.queue_depths()
+
+    results, depths = asyncio.run(run())
+    assert isinstance(results[0], RuntimeError) and results[1] is None
+    assert depths == {}
@@ -0,0 +1,94 @@
+import os
+import asyncio
+from telegram import Bot
+from webhook_server import WebhookServer
+
+
+SECRET_TOKEN = "test-secret"
+
+with open(
+    os.path.join(os.path.dirname(__file__), "data", "update_group_message.json"), "rb"
+) as file:
+    RECORDED_UPDATE = file.read()
+CLOSE_HEADERS = f"Content-Length: {len(RECORDED_UPDATE)}\r\nConnection: close\r\n"
+
+
+class FakeApplication:
+    def __init__(self):
+        self.bot = Bot("1:test")
+        self.update_queue = asyncio.Queue()
+
+
+async def exchange(request: bytes):
+    """
+    Отправляет запрос серверу, возвращает ответ (до закрытия соединения
+    или первого ответа) и полученные обновления
+    """
+    application = FakeApplication()
+    server = WebhookServer(application, "webhook", SECRET_TOKEN)
+    await server.start("127.0.0.1", 0)
+    try:
+        port = server._WebhookServer__server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+    finally:
+        await server.stop()
+    updates = []
+    while not application.update_queue.empty():
+        updates.append(application.update_queue.get_nowait())
+    return response, updates
+
+
+def post(
+    body: bytes, token: str = SECRET_TOKEN, headers: str = "Connection: close\r\n"
+) -> bytes:
+    return (
+        f"POST /webhook HTTP/1.1\r\n"
+        f"Host: bot.example.com\r\n"
+        f"Content-Type: application/json\r\n"
+        f"X-Telegram-Bot-Api-Secret-Token: {token}\r\n"
+        f"{headers}\r\n"
+    ).encode() + body
+
+
+def test_recorded_update_is_queued():
+    request = post(RECORDED_UPDATE, headers=CLOSE_HEADERS)
+    response, updates = asyncio.run(exchange(request))
+    assert response.startswith(b"HTTP/1.1 200 OK")
+    assert len(updates) == 1
+    assert updates[0].update_id == 804116230
+    assert updates[0].message.text == "Подскажите, есть ли диван в сером цвете?"
+    assert updates[0].effective_chat.id == -1001735902211
+
+
+def test_wrong_token_is_rejected():
+    request = post(
+        RECORDED_UPDATE,
+        token="wrong",
+        headers=CLOSE_HEADERS,
+    )
+    response, updates = asyncio.run(exchange(request))
+    assert response.startswith(b"HTTP/1.1 403 Forbidden")
+    assert updates == []
+
+
+def test_chunked_body_is_rejected_and_connection_closed():
+    chunk = RECORDED_UPDATE
+    body = f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n0\r\n\r\n"
+    # Соединение keep-alive: сервер сам закрывает его после ответа,
+    # а тело не читается как следующий запрос
+    request = post(body, headers="Transfer-Encoding: chunked\r\n")
+    response, updates = asyncio.run(exchange(request))
+    assert response.startswith(b"HTTP/1.1 400 Bad Request")
+    assert response.count(b"HTTP/1.1") == 1
+    assert updates == []
+
+
+def test_missing_content_length_is_rejected():
+    response, updates = asyncio.run(exchange(post(RECORDED_UPDATE, headers="")))
+    assert response.startswith(b"HTTP/1.1 411 Length Required")
+    assert response.count(b"HTTP/1.1") == 1
+    assert updates == []
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Awaitable
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Параллельная обработка обновлений с сохранением порядка внутри чата.
+    Обновления разных чатов обрабатываются одновременно (не больше
+    max_concurrent_updates), а обновления одного чата — строго по очереди.
+    Обновления, ожидающие своей очереди в чате, не занимают общие слоты.
+    """
+
+    def __init__(
+        self, max_concurrent_updates: int, max_pending_updates: int = 4096
+    ):
+        # Семафор базового класса ограничивает число принятых обновлений,
+        # собственный — число одновременно выполняемых
+        super().__init__(max(max_pending_updates, max_concurrent_updates))
+        self.__concurrency = max_concurrent_updates
+        self.__semaphore = asyncio.Semaphore(max_concurrent_updates)
+        self.__chat_locks: dict[int, asyncio.Lock] = {}
+        self.__queue_depths: dict[int, int] = {}
+
+    @property
+    def concurrency(self) -> int:
+        """Максимальное число одновременно обрабатываемых обновлений"""
+        return self.__concurrency
+
+    def queue_depths(self) -> dict[int, int]:
+        """Число обновлений в обработке и в очереди по всем чатам"""
+        return dict(self.__queue_depths)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]):
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            async with self.__semaphore:
+                await coroutine
+            return
+
+        chat_id = chat.id
+        self.__queue_depths[chat_id] = self.__queue_depths.get(chat_id, 0) + 1
+        lock = self.__chat_locks.setdefault(chat_id, asyncio.Lock())
+        try:
+            async with lock:
+                async with self.__semaphore:
+                    await coroutine
+        finally:
+            depth = self.__queue_depths[chat_id] - 1
+            if depth:
+                self.__queue_depths[chat_id] = depth
+            else:
+                # Никто больше не ждет блокировку чата
+                del self.__queue_depths[chat_id]
+                del self.__chat_locks[chat_id]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
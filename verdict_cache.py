@@ -0,0 +1,87 @@
+import time
+import hashlib
+from collections import OrderedDict
+
+
+class VerdictCache:
+    """
+    Кэш вердиктов детектора ссылок (LRU с TTL).
+    Ключ — хэш нормализованного текста, поэтому повторная рассылка
+    одного и того же спама по группам проверяется одним обращением к словарю.
+    Размер кэша ограничен max_entries, устаревшие и давно не использованные
+    записи вытесняются. Вместе с вердиктом может храниться список
+    найденных ссылок (для проверки по спискам доменов).
+    """
+
+    def __init__(self, max_entries: int = 50000, ttl: float = 3600):
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__entries: OrderedDict[bytes, tuple[float, bool, list | None]] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(*parts: str) -> bytes:
+        """
+        Ключ кэша для текста (или нескольких частей сообщения)
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update((part or "").strip().encode("utf-8", "surrogatepass"))
+            digest.update(b"\x00")
+        return digest.digest()
+
+    def get(self, key: bytes) -> bool | None:
+        """
+        Возвращает сохраненный вердикт или None
+        """
+        entry = self.__entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.__entries[key]
+            self.misses += 1
+            return None
+
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: bytes, verdict: bool):
+        """
+        Сохраняет вердикт
+        """
+        self.__entries[key] = (time.monotonic() + self.__ttl, verdict, None)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+
+    def links(self, key: bytes) -> list[str] | None:
+        """
+        Сохраненный список ссылок или None (без учета в счетчиках)
+        """
+        entry = self.__entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[2]
+
+    def set_links(self, key: bytes, links: list[str]):
+        """
+        Добавляет список ссылок к сохраненному вердикту
+        """
+        entry = self.__entries.get(key)
+        if entry is not None:
+            self.__entries[key] = (entry[0], entry[1], links)
+
+    def stats(self) -> dict:
+        """
+        Счетчики попаданий и промахов
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.__entries),
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,131 @@
+import hmac
+import json
+import asyncio
+from telegram import Update
+from telegram.ext import Application
+
+
+# Максимальный размер тела запроса с обновлением
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class WebhookServer:
+    """
+    HTTP-сервер для приема обновлений Telegram через вебхук.
+    Проверяет секретный токен из заголовка X-Telegram-Bot-Api-Secret-Token
+    (без токена сервер не запускается: иначе любой, кто может обратиться
+    к порту, отправит поддельное обновление от имени администратора)
+    и передает обновления в очередь приложения, где их обрабатывают
+    те же обработчики, что и при long polling.
+    """
+
+    def __init__(self, application: Application, path: str, secret_token: str):
+        if not secret_token:
+            raise ValueError("Для вебхука нужен секретный токен")
+        self.__application = application
+        self.__path = "/" + path.strip("/")
+        self.__secret_token = secret_token
+        self.__server: asyncio.AbstractServer | None = None
+
+    async def start(self, host: str, port: int):
+        """
+        Запускает прием соединений
+        """
+        self.__server = await asyncio.start_server(
+            self.__handle_connection, host, port
+        )
+        print(f"✅ Вебхук слушает http://{host}:{port}{self.__path}")
+
+    async def stop(self):
+        """
+        Останавливает прием соединений
+        """
+        if self.__server:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+
+    async def __handle_connection(self, reader, writer):
+        try:
+            # Telegram переиспользует соединения, поэтому читаем запросы в цикле
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                repeated = False
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    name = name.strip().lower()
+                    repeated = repeated or (
+                        name == "content-length" and name in headers
+                    )
+                    headers[name] = value.strip()
+
+                parts = request_line.decode("latin-1").split()
+                # Тело читается только по Content-Length: запрос с
+                # Transfer-Encoding или двумя заголовками длины отклоняется,
+                # иначе остаток тела был бы прочитан как следующий запрос
+                if len(parts) != 3 or repeated or "transfer-encoding" in headers:
+                    await self.__respond(writer, 400, "Bad Request", close=True)
+                    break
+                method, path, _ = parts
+
+                if "content-length" not in headers:
+                    await self.__respond(writer, 411, "Length Required", close=True)
+                    break
+                try:
+                    length = int(headers["content-length"])
+                except ValueError:
+                    length = -1
+                if length < 0 or length > MAX_BODY_SIZE:
+                    await self.__respond(writer, 413, "Payload Too Large", close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, reason = await self.__handle_request(
+                    method, path, headers, body
+                )
+                await self.__respond(writer, status, reason, close=not keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            print(f"❌ Ошибка при обработке запроса вебхука: {e}")
+        finally:
+            writer.close()
+
+    async def __handle_request(self, method, path, headers, body):
+        if path.split("?", 1)[0] != self.__path:
+            return 404, "Not Found"
+        if method != "POST":
+            return 405, "Method Not Allowed"
+
+        if not hmac.compare_digest(
+            headers.get("x-telegram-bot-api-secret-token", "").encode("latin-1"),
+            self.__secret_token.encode(),
+        ):
+            return 403, "Forbidden"
+
+        try:
+            update = Update.de_json(json.loads(body), self.__application.bot)
+        except Exception as e:
+            print(f"❌ Некорректное обновление в вебхуке: {e}")
+            return 400, "Bad Request"
+
+        await self.__application.update_queue.put(update)
+        return 200, "OK"
+
+    async def __respond(self, writer, status: int, reason: str, close: bool):
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Length: 0\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode()
+        )
+        await writer.drain()